@@ -5,11 +5,84 @@ load_dotenv()
 
 
 class Settings:
+    log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    log_payload_sample_rate: float = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0"))
     telegram_bot_token: str = os.getenv("TELEGRAM_BOT_TOKEN")
     base_webhook_url: str = os.getenv("BASE_WEBHOOK_URL")
+    telegram_http_timeout: float = float(os.getenv("TELEGRAM_HTTP_TIMEOUT", "30"))
+    telegram_http_max_connections: int = int(
+        os.getenv("TELEGRAM_HTTP_MAX_CONNECTIONS", "20")
+    )
+    telegram_global_rate: float = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+    telegram_chat_rate: float = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+    telegram_chat_burst: float = float(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+    telegram_max_retries: int = int(os.getenv("TELEGRAM_MAX_RETRIES", "3"))
+    telegram_idle_chats: int = int(os.getenv("TELEGRAM_IDLE_CHATS", "1000"))
+    update_lane_size: int = int(os.getenv("UPDATE_LANE_SIZE", "20"))
+    update_max_pending: int = int(os.getenv("UPDATE_MAX_PENDING", "1000"))
+    update_enqueue_timeout: float = float(os.getenv("UPDATE_ENQUEUE_TIMEOUT", "2"))
+    update_retry_after: int = int(os.getenv("UPDATE_RETRY_AFTER", "5"))
+    update_shutdown_timeout: float = float(os.getenv("UPDATE_SHUTDOWN_TIMEOUT", "10"))
+    update_dedup_path: str = os.getenv("UPDATE_DEDUP_PATH", "data/update_dedup.db")
+    update_dedup_window: float = float(os.getenv("UPDATE_DEDUP_WINDOW", "86400"))
+    update_dedup_size: int = int(os.getenv("UPDATE_DEDUP_SIZE", "10000"))
+    update_dedup_flush_interval: float = float(
+        os.getenv("UPDATE_DEDUP_FLUSH_INTERVAL", "1")
+    )
     spreadsheet_id: str = os.getenv("SPREADSHEET_ID")
     credentials_path: str = os.getenv("GOOGLE_CREDENTIALS_PATH", "credentials.json")
     google_api_key = os.getenv("GOOGLE_API_KEY")
+    gemini_max_concurrency: int = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+    gemini_timeout: float = float(os.getenv("GEMINI_TIMEOUT", "30"))
+    worksheet_cache_ttl: float = float(os.getenv("WORKSHEET_CACHE_TTL", "600"))
+    sheet_mirror_path: str = os.getenv("SHEET_MIRROR_PATH", "data/sheet_mirror.db")
+    sheet_mirror_sync_interval: float = float(
+        os.getenv("SHEET_MIRROR_SYNC_INTERVAL", "10")
+    )
+    sheet_mirror_full_sync_interval: float = float(
+        os.getenv("SHEET_MIRROR_FULL_SYNC_INTERVAL", "3600")
+    )
+    aggregate_store_path: str = os.getenv("AGGREGATE_STORE_PATH", "data/aggregates.db")
+    ai_summary_cache_ttl: float = float(os.getenv("AI_SUMMARY_CACHE_TTL", "3600"))
+    ai_summary_cache_size: int = int(os.getenv("AI_SUMMARY_CACHE_SIZE", "256"))
+    summary_trace: bool = os.getenv("SUMMARY_TRACE", "false").lower() == "true"
+    transaction_queue_path: str = os.getenv(
+        "TRANSACTION_QUEUE_PATH", "data/transaction_queue.db"
+    )
+    transaction_queue_batch_size: int = int(
+        os.getenv("TRANSACTION_QUEUE_BATCH_SIZE", "20")
+    )
+    transaction_queue_verify_attempts: int = int(
+        os.getenv("TRANSACTION_QUEUE_VERIFY_ATTEMPTS", "10")
+    )
+    transaction_queue_flush_interval: float = float(
+        os.getenv("TRANSACTION_QUEUE_FLUSH_INTERVAL", "5")
+    )
+    ocr_workers: int = int(os.getenv("OCR_WORKERS", "0"))
+    # Kosong = lokasi tessdata bawaan tesserocr (TESSDATA_PREFIX)
+    ocr_tessdata_path: str = os.getenv("OCR_TESSDATA_PATH", "")
+    ocr_target_dpi: int = int(os.getenv("OCR_TARGET_DPI", "300"))
+    ocr_early_exit_confidence: float = float(
+        os.getenv("OCR_EARLY_EXIT_CONFIDENCE", "75")
+    )
+    receipt_local_confidence: float = float(
+        os.getenv("RECEIPT_LOCAL_CONFIDENCE", "0.9")
+    )
+    receipt_categories_path: str = os.getenv(
+        "RECEIPT_CATEGORIES_PATH", "data/receipt_categories.json"
+    )
+    receipt_category_min_length: int = int(
+        os.getenv("RECEIPT_CATEGORY_MIN_LENGTH", "3")
+    )
+    receipt_category_min_confirmations: int = int(
+        os.getenv("RECEIPT_CATEGORY_MIN_CONFIRMATIONS", "2")
+    )
+    receipt_cache_path: str = os.getenv("RECEIPT_CACHE_PATH", "data/receipt_cache.db")
+    receipt_cache_size: int = int(os.getenv("RECEIPT_CACHE_SIZE", "500"))
+    receipt_batch_workers: int = int(os.getenv("RECEIPT_BATCH_WORKERS", "0"))
+    receipt_batch_queue_size: int = int(os.getenv("RECEIPT_BATCH_QUEUE_SIZE", "500"))
+    receipt_batch_max_jobs: int = int(os.getenv("RECEIPT_BATCH_MAX_JOBS", "50"))
+    receipt_batch_max_files: int = int(os.getenv("RECEIPT_BATCH_MAX_FILES", "200"))
 
 
 settings = Settings()
@@ -1,5 +1,13 @@
+import asyncio
+import io
+import os
+import zipfile
+from typing import List
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from app.service.gemini import GeminiReceiptProcessor
+from app.core.config import settings
+from app.service.gemini import GeminiReceiptProcessor, receipt_route_stats
+from app.service.receipt_batch import receipt_batch_queue
+from app.service.receipt_cache import image_digest
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -7,6 +15,50 @@ router = APIRouter(prefix="/gemini")
 
 processor = GeminiReceiptProcessor()
 
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+
+
+def _is_zip(file: UploadFile) -> bool:
+    return file.content_type in ("application/zip", "application/x-zip-compressed") or (
+        file.filename or ""
+    ).lower().endswith(".zip")
+
+
+def _too_many_images():
+    return HTTPException(
+        status_code=413,
+        detail=f"Maksimal {settings.receipt_batch_max_files} gambar per batch.",
+    )
+
+
+def _zip_images(filename: str, contents: bytes, limit: int) -> list:
+    """(name, bytes, sha256) of the images in a zip, at most ``limit`` of them."""
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(contents))
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail=f"{filename} bukan file zip valid.")
+    images = []
+    with archive:
+        for info in archive.infolist():
+            name = info.filename
+            if (
+                info.is_dir()
+                or name.startswith("__MACOSX/")
+                or os.path.basename(name).startswith(".")
+                or not name.lower().endswith(IMAGE_EXTENSIONS)
+            ):
+                continue
+            if info.file_size > MAX_IMAGE_BYTES:
+                raise HTTPException(
+                    status_code=413, detail=f"{name} melebihi batas ukuran gambar."
+                )
+            if len(images) >= limit:
+                raise _too_many_images()
+            data = archive.read(info)
+            images.append((f"{filename}/{name}", data, image_digest(data)))
+    return images
+
 
 @router.post("/test")
 async def scan(file: UploadFile = File(...)):
@@ -21,3 +73,56 @@ async def scan(file: UploadFile = File(...)):
         raise HTTPException(
             status_code=500, detail=f"Error processing receipt: {str(e)}"
         )
+
+
+@router.get("/stats")
+async def get_receipt_stats():
+    return receipt_route_stats.snapshot()
+
+
+@router.post("/batch", status_code=202)
+async def scan_batch(files: List[UploadFile] = File(...)):
+    """Queue many receipts (images and/or zip archives) and return a job ID."""
+    loop = asyncio.get_running_loop()
+    images = []
+    for file in files:
+        contents = await file.read()
+        limit = settings.receipt_batch_max_files - len(images)
+        if _is_zip(file):
+            # Ekstraksi dan hashing zip berjalan di thread, bukan di event loop
+            images.extend(
+                await loop.run_in_executor(
+                    None, _zip_images, file.filename, contents, limit
+                )
+            )
+        elif file.content_type and file.content_type.startswith("image/"):
+            if limit <= 0:
+                raise _too_many_images()
+            images.append((file.filename, contents, image_digest(contents)))
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{file.filename} harus berupa gambar atau file zip.",
+            )
+
+    if not images:
+        raise HTTPException(status_code=400, detail="Tidak ada gambar nota di upload.")
+
+    try:
+        job = receipt_batch_queue.submit(images)
+    except asyncio.QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job.snapshot(include_results=False)
+
+
+@router.get("/batch")
+async def get_batch_queue_stats():
+    return receipt_batch_queue.stats()
+
+
+@router.get("/batch/{job_id}")
+async def get_batch_job(job_id: str, results: bool = True):
+    job = receipt_batch_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan.")
+    return job.snapshot(include_results=results)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from app.service.ocr import OCRService
+from app.service.ocr import OCRService, ocr_stats
 
 router = APIRouter(prefix="/ocr")
 
@@ -28,3 +28,8 @@ async def scan_nota_ocr(
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Gagal memproses OCR: {e}")
+
+
+@router.get("/stats")
+async def get_ocr_stats():
+    return ocr_stats.snapshot()
@@ -1,10 +1,28 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from app.service.summary import SummaryGenerator
+from app.utils.logger import get_logger
 from app.utils.sheets import test_google_sheet_connection
 
+logger = get_logger(__name__)
 router = APIRouter(prefix="/sheet")
 
+summary_generator = SummaryGenerator()
+
 
 @router.get("/test")
 async def test_sheet():
     success, message = test_google_sheet_connection()
     return {"success": success, "message": message}
+
+
+@router.post("/aggregates/rebuild")
+async def rebuild_aggregates(year: Optional[int] = None):
+    try:
+        rebuilt = summary_generator.rebuild_aggregates(year)
+        return {"success": True, "rebuilt": rebuilt}
+    except Exception as e:
+        logger.error(f"Error rebuilding aggregates: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Gagal membangun ulang agregat: {e}"
+        )
@@ -1,26 +1,38 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 import logging
 from app.schema.webhook import Update, WebhookResponse
-from app.service.webhook import TelegramService
+from app.service.webhook import telegram_service, update_lanes
+from app.service.telegram_dispatcher import telegram_dispatcher
+from app.service.update_dedup import update_dedup
 from app.core.config import settings
 
 router = APIRouter(prefix="/telegram")
 logger = logging.getLogger(__name__)
 
-telegram_service = TelegramService()
-
 
 @router.post("/webhook", response_model=WebhookResponse)
-async def telegram_webhook(update: Update, background_tasks: BackgroundTasks):
-    try:
-        background_tasks.add_task(telegram_service.process_update, update)
-
-        return WebhookResponse(status="success", message="Update processed")
+async def telegram_webhook(update: Update):
+    # Update yang dikirim ulang Telegram cukup dijawab sukses tanpa diproses
+    if not update_dedup.accept(update.update_id):
+        return WebhookResponse(status="success", message="Duplicate update ignored")
 
+    try:
+        accepted = await update_lanes.submit(update)
     except Exception as e:
+        update_dedup.forget(update.update_id)
         logger.error(f"Error in webhook endpoint: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+    if not accepted:
+        update_dedup.forget(update.update_id)
+        # Telegram mengirim ulang update yang dijawab dengan error
+        raise HTTPException(
+            status_code=429,
+            detail="Too many pending updates",
+            headers={"Retry-After": str(settings.update_retry_after)},
+        )
+    return WebhookResponse(status="success", message="Update processed")
+
 
 @router.post("/set")
 async def set_webhook():
@@ -47,3 +59,18 @@ async def get_webhook_info():
     except Exception as e:
         logger.error(f"Error getting webhook info: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/dispatcher")
+async def get_dispatcher_stats():
+    return telegram_dispatcher.stats()
+
+
+@router.get("/lanes")
+async def get_lane_stats():
+    return update_lanes.stats()
+
+
+@router.get("/dedup")
+async def get_dedup_stats():
+    return update_dedup.stats()
@@ -0,0 +1,188 @@
+import os
+import sqlite3
+import threading
+from app.core.config import settings
+from app.utils.ledger import LedgerArrays
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Urutan kolom baris yang ditulis build_transaction_row
+DATE_IDX, TYPE_IDX, SOURCE_IDX, CATEGORY_IDX, AMOUNT_IDX = 0, 2, 3, 4, 5
+
+
+class AggregateStore:
+    """
+    Materialized monthly totals per (year, month, jenis, kategori, sumber).
+
+    Totals are kept per sheet together with the number of data rows they
+    cover and the mirror ``version`` they were built from. Appends add to
+    them directly; when the row count no longer matches the sheet (rows
+    written elsewhere) or the mirror was reloaded with different content
+    (manual edits) the caller rebuilds the sheet's totals from its rows.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or settings.aggregate_store_path
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS monthly (
+                    sheet TEXT NOT NULL,
+                    year INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    jenis TEXT NOT NULL,
+                    kategori TEXT NOT NULL,
+                    sumber TEXT NOT NULL,
+                    total INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (sheet, year, month, jenis, kategori, sumber)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sheets (
+                    sheet TEXT PRIMARY KEY,
+                    row_count INTEGER NOT NULL,
+                    source_version TEXT
+                )
+                """
+            )
+            columns = {
+                row[1] for row in self._conn.execute("PRAGMA table_info(sheets)")
+            }
+            if "source_version" not in columns:
+                self._conn.execute("ALTER TABLE sheets ADD COLUMN source_version TEXT")
+
+    def add_listener(self, callback):
+        """
+        Call ``callback(months)`` whenever totals change, ``months`` being a
+        set of (year, month) pairs or None when a whole sheet was rebuilt.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, months):
+        for callback in self._listeners:
+            try:
+                callback(months)
+            except Exception as e:
+                logger.error(f"Aggregate listener failed: {e}")
+
+    def row_count(self, sheet):
+        """Data rows covered by the totals of ``sheet``, None if never built."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT row_count FROM sheets WHERE sheet = ?", (sheet,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def source_version(self, sheet):
+        """Mirror version the totals of ``sheet`` were last rebuilt from."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT source_version FROM sheets WHERE sheet = ?", (sheet,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def add_rows(self, sheet, rows):
+        """Fold freshly appended rows (``build_transaction_row`` layout) in."""
+        if self.row_count(sheet) is None:
+            # Belum pernah dibangun, ringkasan berikutnya akan rebuild penuh
+            return
+
+        rows = [[str(value) for value in row] for row in rows]
+        groups = LedgerArrays(
+            rows, DATE_IDX, AMOUNT_IDX, TYPE_IDX, CATEGORY_IDX, SOURCE_IDX
+        ).group_totals()
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO monthly (sheet, year, month, jenis, kategori, sumber, total, count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (sheet, year, month, jenis, kategori, sumber)
+                DO UPDATE SET total = total + excluded.total, count = count + excluded.count
+                """,
+                [(sheet, *group) for group in groups],
+            )
+            self._conn.execute(
+                "UPDATE sheets SET row_count = row_count + ? WHERE sheet = ?",
+                (len(rows), sheet),
+            )
+        self._notify({(group[0], group[1]) for group in groups})
+
+    def rebuild(self, sheet, ledger: LedgerArrays, row_count: int, source_version=None):
+        """Replace the totals of ``sheet`` with the groups of ``ledger``."""
+        groups = ledger.group_totals()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM monthly WHERE sheet = ?", (sheet,))
+            self._conn.executemany(
+                "INSERT INTO monthly (sheet, year, month, jenis, kategori, sumber, total, count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(sheet, *group) for group in groups],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sheets (sheet, row_count, source_version) "
+                "VALUES (?, ?, ?)",
+                (sheet, row_count, source_version),
+            )
+        logger.info(f"Rebuilt aggregates for {sheet}: {len(groups)} groups")
+        self._notify(None)
+
+    def month_totals(self, sheet, year, month):
+        """
+        Totals for one month of ``sheet``.
+
+        Returns (transaction_count, total_income, total_expense,
+        expense_by_category, income_by_category).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT jenis, kategori, SUM(total), SUM(count) FROM monthly
+                WHERE sheet = ? AND year = ? AND month = ?
+                GROUP BY jenis, kategori
+                """,
+                (sheet, year, month),
+            ).fetchall()
+
+        transaction_count = total_income = total_expense = 0
+        expense_by_category = {}
+        income_by_category = {}
+        for jenis, kategori, total, count in rows:
+            transaction_count += count
+            if jenis == "Pemasukan":
+                total_income += total
+                income_by_category[kategori] = total
+            else:
+                total_expense += total
+                expense_by_category[kategori] = total
+
+        return (
+            transaction_count,
+            total_income,
+            total_expense,
+            expense_by_category,
+            income_by_category,
+        )
+
+    def reset(self, sheet=None):
+        with self._lock, self._conn:
+            if sheet is None:
+                self._conn.execute("DELETE FROM monthly")
+                self._conn.execute("DELETE FROM sheets")
+            else:
+                self._conn.execute("DELETE FROM monthly WHERE sheet = ?", (sheet,))
+                self._conn.execute("DELETE FROM sheets WHERE sheet = ?", (sheet,))
+
+
+aggregate_store = AggregateStore()
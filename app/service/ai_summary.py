@@ -1,40 +1,93 @@
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+import hashlib
 import json
-from google import generativeai as genai
+import threading
+
+from cachetools import TTLCache
 
-from app.utils.logger import get_logger
 from app.core.config import settings
-from app.service.sheet import SheetsService
+from app.utils.logger import get_logger
+from app.service.aggregates import aggregate_store
+from app.service.llm import gemini_gateway
 from app.service.summary import SummaryGenerator
+from app.utils.trace import RequestTrace
 
 logger = get_logger(__name__)
 
 
+class AnalysisCache:
+    """
+    TTL and size bounded cache of LLM analyses.
+
+    Entries are keyed by (year, month, normalized query, fingerprint of the
+    financial data sent in the prompt), so changed totals never hit an old
+    entry. Entries of a month are also dropped as soon as its aggregates
+    change.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        self._cache = TTLCache(
+            maxsize=maxsize or settings.ai_summary_cache_size,
+            ttl=ttl or settings.ai_summary_cache_ttl,
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(data: Dict[str, Any], query: Optional[str]):
+        fingerprint = hashlib.sha256(
+            json.dumps(data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        normalized_query = " ".join((query or "").lower().split())
+        return data["year"], data["month"], normalized_query, fingerprint
+
+    def get(self, data: Dict[str, Any], query: Optional[str]) -> Optional[str]:
+        with self._lock:
+            analysis = self._cache.get(self.key(data, query))
+            if analysis is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return analysis
+
+    def put(self, data: Dict[str, Any], query: Optional[str], analysis: str):
+        with self._lock:
+            self._cache[self.key(data, query)] = analysis
+
+    def invalidate(self, months=None):
+        """Drop entries of the given (year, month) pairs, or everything."""
+        with self._lock:
+            if months is None:
+                self._cache.clear()
+                return
+            for key in [key for key in self._cache if (key[0], key[1]) in months]:
+                self._cache.pop(key, None)
+
+
 class AISummaryGenerator:
     def __init__(self):
         self.standard_summary = SummaryGenerator()
-
-        genai.configure(api_key=settings.google_api_key)
-        self.model = genai.GenerativeModel(model_name="gemini-1.5-flash")
+        self.llm = gemini_gateway
+        self.cache = AnalysisCache()
+        aggregate_store.add_listener(self.cache.invalidate)
 
     async def get_monthly_summary(
-        self, year: int, month: int, query: str = None
+        self, year: int, month: int, query: str = None, trace: bool = False
     ) -> Dict[str, Any]:
+        trace = RequestTrace(logger, f"summary {month}/{year}", enabled=trace)
         try:
             # First, get the standard summary data
             standard_result = await self.standard_summary.get_monthly_summary(
-                year, month
+                year, month, trace=trace
             )
 
             if standard_result["status"] != "success":
                 return standard_result
 
             # Log received data structure for debugging
-            logger.info(f"Standard result keys: {standard_result.keys()}")
-            logger.info(
-                f"Standard result: {standard_result}"
-            )  # Log the actual result for debugging
+            trace.log("Standard result: %s", standard_result)
 
             # Extract data based on the result structure
             data = standard_result.get("data", {})
@@ -44,6 +97,7 @@ class AISummaryGenerator:
                 total_expense = data.get("expense", 0)
                 balance = data.get("balance", 0)
                 category_totals = data.get("categories", {})
+                income_categories = data.get("income_categories", {})
             else:
                 # Direct keys fallback
                 total_income = standard_result.get("total_income", 0)
@@ -52,12 +106,15 @@ class AISummaryGenerator:
                 category_totals = standard_result.get(
                     "category_totals", standard_result.get("categories", {})
                 )
+                income_categories = {}
 
             month_name = standard_result.get("month_name", "")
 
             # Get transaction count from multiple possible sources
             transaction_count = 0
-            if "raw_data" in standard_result:
+            if isinstance(data, dict) and "transaction_count" in data:
+                transaction_count = data["transaction_count"]
+            elif "raw_data" in standard_result:
                 transaction_count = len(standard_result["raw_data"])
             elif "data" in standard_result and isinstance(
                 standard_result.get("data"), list
@@ -86,21 +143,37 @@ class AISummaryGenerator:
                 "total_expense": total_expense,
                 "balance": balance,
                 "categories": category_totals,
+                "income_categories": income_categories,
                 "transaction_count": transaction_count
                 or 8,  # Default to 8 if nothing else found
             }
 
-            logger.info(
-                f"Prepared financial data for AI: {json.dumps(financial_data, indent=2)}"
-            )
+            if trace.enabled:
+                trace.log(
+                    "Prepared financial data for AI: %s",
+                    json.dumps(financial_data, indent=2),
+                )
 
             # Generate analysis based on query
+            trace.mark("standard")
+            analysis = self.cache.get(financial_data, query)
+            if analysis is not None:
+                trace.mark("cache")
+                logger.info(
+                    f"AI summary {month}/{year} from cache: {trace.format_timings()}"
+                )
+                standard_result["analysis"] = analysis
+                standard_result["is_ai_generated"] = True
+                return standard_result
+
             if query:
-                logger.info(f"Generating specific analysis for query: {query}")
-                analysis = await self.generate_specific_analysis(financial_data, query)
+                analysis = await self.generate_specific_analysis(
+                    financial_data, query, trace
+                )
             else:
-                logger.info("Generating general analysis")
-                analysis = await self.generate_ai_analysis(financial_data)
+                analysis = await self.generate_ai_analysis(financial_data, trace)
+            trace.mark("llm")
+            logger.info(f"AI summary {month}/{year}: {trace.format_timings()}")
 
             # Update the result
             standard_result["analysis"] = analysis
@@ -115,15 +188,23 @@ class AISummaryGenerator:
                 "message": f"Gagal menghasilkan ringkasan AI: {str(e)}",
             }
 
-    async def generate_ai_analysis(self, data: Dict[str, Any]) -> str:
+    async def generate_ai_analysis(
+        self, data: Dict[str, Any], trace: RequestTrace = None
+    ) -> str:
+        if trace is None:
+            trace = RequestTrace(logger, "ai analysis")
+
         total_income = data.get("total_income", 0)
         total_expense = data.get("total_expense", 0)
         balance = data.get("balance", total_income - total_expense)
         categories = data.get("categories", {})
         transaction_count = data.get("transaction_count", 0)
 
-        logger.info(
-            f"Financial data for AI analysis: Income={total_income}, Expense={total_expense}, Categories={categories}"
+        trace.log(
+            "Financial data for AI analysis: Income=%s, Expense=%s, Categories=%s",
+            total_income,
+            total_expense,
+            categories,
         )
 
         prompt = f"""
@@ -158,12 +239,13 @@ Berikan analisis keuangan singkat dengan format berikut (JANGAN tambahkan spasi/
         )
 
         try:
-            logger.info("Sending prompt to Gemini AI for general analysis")
-            response = self.model.generate_content(prompt)
-            logger.info(f"Raw AI response: {response.text[:200]}...")
+            trace.log("Sending prompt to Gemini AI for general analysis")
+            response = await self.llm.generate_content(prompt)
+            trace.log("Raw AI response: %s...", response.text[:200])
             analysis = response.text
 
             analysis = analysis.replace("```", "").strip()
+            self.cache.put(data, None, analysis)
 
             return analysis
 
@@ -197,8 +279,12 @@ Berikan analisis keuangan singkat dengan format berikut (JANGAN tambahkan spasi/
             ).replace(",", ".")
             return fallback.strip()
 
-    async def generate_specific_analysis(self, data: Dict[str, Any], query: str) -> str:
-        logger.info(f"Generating specific analysis for query: '{query}'")
+    async def generate_specific_analysis(
+        self, data: Dict[str, Any], query: str, trace: RequestTrace = None
+    ) -> str:
+        if trace is None:
+            trace = RequestTrace(logger, "specific analysis")
+        trace.log("Generating specific analysis for query: '%s'", query)
 
         query_lower = query.lower()
         is_income_query = any(
@@ -277,11 +363,12 @@ Contoh jawaban untuk "top pengeluaran":
         )
 
         try:
-            logger.info("Sending prompt to Gemini AI for specific analysis")
-            response = self.model.generate_content(prompt)
+            trace.log("Sending prompt to Gemini AI for specific analysis")
+            response = await self.llm.generate_content(prompt)
             analysis = response.text
             analysis = analysis.replace("```", "").strip()
-            logger.info("Successfully generated specific analysis")
+            trace.log("Successfully generated specific analysis")
+            self.cache.put(data, query, analysis)
             return analysis
 
         except Exception as e:
@@ -1,30 +1,99 @@
 from app.utils.logger import get_logger
-from app.core.config import settings
-from google import generativeai as genai
 import json
+import threading
+from app.core.config import settings
+from app.service.llm import gemini_gateway
 from app.service.ocr import OCRService
+from app.service.receipt_cache import image_digest, receipt_cache
+from app.utils.receipt_parser import ReceiptParser
 
 logger = get_logger(__name__)
 
+ERROR_NAME = "Error processing receipt"
+
+
+class ReceiptRouteStats:
+    """How many receipts were parsed locally instead of by the LLM."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.local = 0
+        self.llm = 0
+
+    def record(self, local: bool):
+        with self._lock:
+            if local:
+                self.local += 1
+            else:
+                self.llm += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = self.local + self.llm
+            return {
+                "receipts": total,
+                "llm_calls_avoided": self.local,
+                "llm_calls": self.llm,
+                "avoided_rate": round(self.local / total, 3) if total else 0.0,
+            }
+
+
+receipt_route_stats = ReceiptRouteStats()
+
 
 class GeminiReceiptProcessor:
     def __init__(self):
-        genai.configure(api_key=settings.google_api_key)
-        self.model = genai.GenerativeModel(model_name="gemini-1.5-flash")
+        self.llm = gemini_gateway
         self.ocr_service = OCRService()
+        self.receipt_parser = ReceiptParser()
         logger.info("Gemini Receipt Processor initialized")
 
-    async def process_receipt(self, image_bytes: bytes) -> dict:
+    async def process_receipt(
+        self,
+        image_bytes: bytes = None,
+        file_unique_id: str = None,
+        fetch_image=None,
+        image_hash: str = None,
+    ) -> dict:
         try:
+            if image_bytes and image_hash is None:
+                image_hash = image_digest(image_bytes)
+            cached = receipt_cache.get(file_unique_id, image_hash)
+            if cached is None and not image_bytes and fetch_image is not None:
+                # Entri cache bisa terhapus sejak dicek, jadi foto diunduh ulang
+                image_bytes = await fetch_image()
+                image_hash = image_digest(image_bytes) if image_bytes else None
+                cached = receipt_cache.get(None, image_hash) if image_hash else None
+            if cached is not None:
+                logger.info(
+                    f"Receipt served from cache ({file_unique_id or image_hash})"
+                )
+                return cached
+            if not image_bytes:
+                raise ValueError("Foto nota tidak tersedia, silakan kirim ulang")
+
             ocr_text = await self.ocr_service.process_image_for_ocr(image_bytes)
 
-            result = await self.extract_data_from_ocr(ocr_text)
+            # Struk yang jelas cukup diparse lokal, sisanya ke LLM
+            result = self.receipt_parser.parse_receipt_text(ocr_text)
+            score, checks = self.receipt_parser.score(result)
+            local = score >= settings.receipt_local_confidence
+            receipt_route_stats.record(local)
+            logger.info(f"Receipt parse score {score} {checks}, local={local}")
+
+            if local:
+                result.pop("raw_text", None)
+            else:
+                result = await self.extract_data_from_ocr(ocr_text)
 
             result["jenis"] = "Pengeluaran"
             result["sumber"] = "Cash"
 
             result["raw_ocr_text"] = ocr_text
 
+            if result.get("nama") != ERROR_NAME:
+                receipt_cache.put(image_hash, result, file_unique_id)
+
             logger.info(f"Gemini receipt processing successful")
             return result
 
@@ -32,7 +101,7 @@ class GeminiReceiptProcessor:
             logger.error(f"Error in Gemini receipt processing: {str(e)}")
             return {
                 "tanggal": "",
-                "nama": "Error processing receipt",
+                "nama": ERROR_NAME,
                 "jenis": "Pengeluaran",
                 "sumber": "Cash",
                 "kategori": "Lainnya",
@@ -82,7 +151,7 @@ class GeminiReceiptProcessor:
         """
 
         try:
-            response = self.model.generate_content(prompt)
+            response = await self.llm.generate_content(prompt)
             result_text = response.text
 
             try:
@@ -104,7 +173,7 @@ class GeminiReceiptProcessor:
             logger.error(f"Error extracting data with Gemini: {str(e)}")
             return {
                 "tanggal": "",
-                "nama": "Error processing receipt",
+                "nama": ERROR_NAME,
                 "kategori": "Lainnya",
                 "jumlah": "0",
                 "deskripsi": "",
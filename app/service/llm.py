@@ -0,0 +1,45 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from google import generativeai as genai
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class GeminiGateway:
+    """
+    Async entry point for every Gemini call.
+
+    The SDK call is blocking, so it runs on a dedicated thread pool. A
+    semaphore caps the number of requests in flight and each call is bounded
+    by a timeout, so a slow response only delays the chat that asked for it.
+    """
+
+    def __init__(self, model_name="gemini-1.5-flash", max_in_flight=None, timeout=None):
+        genai.configure(api_key=settings.google_api_key)
+        self.model = genai.GenerativeModel(model_name=model_name)
+        self.max_in_flight = max_in_flight or settings.gemini_max_concurrency
+        self.timeout = timeout or settings.gemini_timeout
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_in_flight, thread_name_prefix="gemini"
+        )
+
+    async def generate_content(self, prompt: str):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            call = loop.run_in_executor(
+                self._executor,
+                lambda: self.model.generate_content(
+                    prompt, request_options={"timeout": self.timeout}
+                ),
+            )
+            try:
+                return await asyncio.wait_for(call, self.timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"Gemini call timed out after {self.timeout}s")
+                raise
+
+
+gemini_gateway = GeminiGateway()
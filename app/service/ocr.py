@@ -1,90 +1,212 @@
-from PIL import Image, ImageEnhance, ImageFilter
-import pytesseract
-import io
+import asyncio
+import os
+import time
+import re
+import threading
 import numpy as np
 import cv2
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.service.tesseract import tesseract_engine
 from app.utils.logger import get_logger
+from app.utils.receipt_image import prepare_receipt
 from app.utils.receipt_parser import ReceiptParser
 
 logger = get_logger(__name__)
 
+# Thread pool sudah cukup: tesserocr melepas GIL selama OCR, jadi tidak perlu
+# process pool. Jumlahnya sama dengan worker tesseract_engine.
+ocr_executor = ThreadPoolExecutor(
+    max_workers=settings.ocr_workers or os.cpu_count() or 1,
+    thread_name_prefix="ocr",
+)
 
-class OCRService:
-    def __init__(self):
-        logger.info("Enhanced OCRService initialized.")
-        self.custom_config = (
-            r'--oem 3 --psm 6 -c preserve_interword_spaces=1 -c page_separator=""'
-        )
-        self.receipt_parser = ReceiptParser()
 
-    async def process_image_for_ocr(self, image_bytes: bytes) -> str:
-        try:
-            image = Image.open(io.BytesIO(image_bytes))
+# Penanda baris total pada struk
+TOTAL_ANCHOR = re.compile(r"\b(?:GRAND\s*TOTAL|TOTAL|JUMLAH|TAGIHAN)\b", re.IGNORECASE)
+# l, I atau | yang terbaca di antara angka hampir selalu angka 1
+DIGIT_ONE_LOOKALIKE = re.compile(r"(?<=\d)[lI|](?=\d)")
 
-            if image.mode != "RGB":
-                image = image.convert("RGB")
 
-            width, height = image.size
-            if width < 1000 or height < 1000:
-                scale_factor = 2
-                image = image.resize(
-                    (width * scale_factor, height * scale_factor), Image.LANCZOS
-                )
+class OCRPass:
+    """Text and mean word confidence of one Tesseract pass."""
 
-            img_cv = np.array(image)
-            img_cv = cv2.cvtColor(img_cv, cv2.COLOR_RGB2BGR)
+    def __init__(self, name: str, text: str, confidence: float, elapsed_ms: float):
+        self.name = name
+        self.text = text
+        self.confidence = confidence
+        self.elapsed_ms = elapsed_ms
+        self.has_total = bool(TOTAL_ANCHOR.search(text))
 
-            gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+    def score(self):
+        # Teks dengan anchor TOTAL lebih dipercaya, lalu confidence, lalu panjang
+        return (self.has_total, self.confidence, len(self.text))
 
-            blur = cv2.GaussianBlur(gray, (3, 3), 0)
 
-            thresh = cv2.adaptiveThreshold(
-                blur, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-            )
+class OCRStats:
+    """Process-wide counters of OCR passes and early exits."""
 
-            kernel = np.ones((1, 1), np.uint8)
-            opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.scans = 0
+            self.early_exits = 0
+            self.preprocess_ms = 0.0
+            self.pass_runs = {}
+            self.pass_ms = {}
+
+    def record(self, preprocess_ms: float, results, early_exit: bool):
+        with self._lock:
+            self.scans += 1
+            self.early_exits += int(early_exit)
+            self.preprocess_ms += preprocess_ms
+            for result in results:
+                self.pass_runs[result.name] = self.pass_runs.get(result.name, 0) + 1
+                self.pass_ms[result.name] = (
+                    self.pass_ms.get(result.name, 0.0) + result.elapsed_ms
+                )
 
-            enhanced_image = Image.fromarray(opening)
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "scans": self.scans,
+                "early_exits": self.early_exits,
+                "early_exit_rate": (
+                    round(self.early_exits / self.scans, 3) if self.scans else 0.0
+                ),
+                "avg_preprocess_ms": (
+                    round(self.preprocess_ms / self.scans, 1) if self.scans else 0.0
+                ),
+                "passes": {
+                    name: {
+                        "runs": runs,
+                        "avg_ms": round(self.pass_ms[name] / runs, 1),
+                    }
+                    for name, runs in self.pass_runs.items()
+                },
+            }
+
+
+ocr_stats = OCRStats()
 
-            enhancer = ImageEnhance.Contrast(enhanced_image)
-            enhanced_image = enhancer.enhance(2.0)
 
-            enhanced_image = enhanced_image.filter(ImageFilter.SHARPEN)
+class OCRService:
+    def __init__(self):
+        logger.info("Enhanced OCRService initialized.")
+        self.receipt_parser = ReceiptParser()
 
-            text1 = pytesseract.image_to_string(
-                enhanced_image, lang="eng+ind", config=self.custom_config
-            )
+    def _preprocess(self, image_bytes: bytes) -> np.ndarray:
+        """
+        Decode, crop and binarize one grayscale buffer for every pass.
+
+        Blur and threshold run in place. The old contrast, sharpen and 1x1
+        opening steps are gone: on a 0/255 image they changed no pixel.
+        """
+        gray = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise ValueError("Gambar tidak dapat dibaca")
+
+        # Potong ke kertas struk dan samakan resolusinya sebelum OCR
+        gray = prepare_receipt(gray, settings.ocr_target_dpi)
+
+        cv2.GaussianBlur(gray, (3, 3), 0, dst=gray)
+        cv2.adaptiveThreshold(
+            gray,
+            255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY,
+            11,
+            2,
+            dst=gray,
+        )
+        return gray
+
+    def _passes(self, binary: np.ndarray):
+        """(name, image, psm, inverted) of every Tesseract pass, best text wins."""
+        return [
+            ("psm6", binary, 6, False),
+            ("psm4", binary, 4, False),
+            ("psm6_inverted", binary, 6, True),
+        ]
+
+    @staticmethod
+    def _run_pass(name: str, image, psm: int, inverted: bool) -> "OCRPass":
+        started = time.perf_counter()
+        if inverted:
+            # Salinan terbalik hanya dibuat bila pass ini benar-benar jalan
+            image = cv2.bitwise_not(image)
+        data = tesseract_engine.image_to_data(image, psm)
+
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data["text"]):
+            word = word.strip()
+            confidence = float(data["conf"][i])
+            if not word or confidence < 0:
+                continue
+            confidences.append(confidence)
+            line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(line_key, []).append(word)
+
+        text = "\n".join(" ".join(words) for words in lines.values())
+        confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        return OCRPass(name, text, confidence, (time.perf_counter() - started) * 1000)
+
+    def _is_confident(self, result: "OCRPass") -> bool:
+        return (
+            result.confidence >= settings.ocr_early_exit_confidence and result.has_total
+        )
 
-            custom_config2 = r"--oem 3 --psm 4 -c preserve_interword_spaces=1"
-            text2 = pytesseract.image_to_string(
-                enhanced_image, lang="eng+ind", config=custom_config2
-            )
+    async def process_image_for_ocr(self, image_bytes: bytes) -> str:
+        try:
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
 
-            inverted_image = Image.fromarray(cv2.bitwise_not(opening))
-            text3 = pytesseract.image_to_string(
-                inverted_image, lang="eng+ind", config=self.custom_config
+            binary = await loop.run_in_executor(
+                ocr_executor, self._preprocess, image_bytes
             )
+            preprocess_ms = (time.perf_counter() - started) * 1000
+
+            first, *fallbacks = self._passes(binary)
+            results = [await loop.run_in_executor(ocr_executor, self._run_pass, *first)]
+
+            early_exit = self._is_confident(results[0])
+            if not early_exit:
+                # Gambar sulit: jalankan pass cadangan secara paralel
+                results += await asyncio.gather(
+                    *(
+                        loop.run_in_executor(ocr_executor, self._run_pass, *args)
+                        for args in fallbacks
+                    )
+                )
 
-            texts = [text1, text2, text3]
-            extracted_text = max(texts, key=len)
+            best = max(results, key=OCRPass.score)
+            ocr_stats.record(preprocess_ms, results, early_exit)
 
-            extracted_text = self._clean_ocr_text(extracted_text)
+            extracted_text = self._clean_ocr_text(best.text)
 
-            logger.info("Enhanced OCR successful with multiple processing steps.")
+            logger.info(
+                f"OCR done: best={best.name} conf={best.confidence:.0f} "
+                f"early_exit={early_exit} preprocess={preprocess_ms:.0f}ms "
+                + " ".join(f"{r.name}={r.elapsed_ms:.0f}ms" for r in results)
+            )
             return extracted_text
         except Exception as e:
             logger.error(f"Error during OCR processing: {type(e).__name__}: {e}")
             raise
 
     def _clean_ocr_text(self, text: str) -> str:
-        import re
-
         text = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\xff]", "", text)
 
-        text = re.sub(r"\s+", " ", text)
+        # Pertahankan baris agar item dan total struk tetap terpisah
+        text = re.sub(r"[ \t]+", " ", text)
 
-        text = text.replace("|", "I").replace("l", "I")
+        # Hanya di antara angka, huruf l pada "Total"/"Jumlah" harus tetap utuh
+        # agar anchor total dan label jumlah masih cocok
+        text = DIGIT_ONE_LOOKALIKE.sub("1", text)
 
         text = re.sub(r"\n\s*\n", "\n", text)
 
@@ -0,0 +1,194 @@
+import asyncio
+import copy
+import os
+import time
+import uuid
+from collections import OrderedDict
+from app.core.config import settings
+from app.service.gemini import ERROR_NAME, GeminiReceiptProcessor
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+
+
+class ReceiptBatchJob:
+    """Progress and results of one uploaded batch of receipt images."""
+
+    def __init__(self, filenames, image_hashes):
+        self.id = uuid.uuid4().hex
+        self.created_at = time.time()
+        self.finished_at = None
+        self.filenames = list(filenames)
+        self.image_hashes = list(image_hashes)
+        self.results = [None] * len(self.filenames)
+        self.started = 0
+        self.done = 0
+        self.failed = 0
+
+    @property
+    def total(self) -> int:
+        return len(self.filenames)
+
+    @property
+    def status(self) -> str:
+        if self.done == self.total:
+            return DONE
+        return RUNNING if self.started else QUEUED
+
+    def complete(self, index: int, result: dict):
+        self.results[index] = result
+        self.done += 1
+        if result.get("nama") == ERROR_NAME:
+            self.failed += 1
+        if self.done == self.total:
+            self.finished_at = time.time()
+
+    def snapshot(self, include_results=True) -> dict:
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "failed": self.failed,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if include_results:
+            data["results"] = [
+                {"filename": filename, "image_hash": image_hash, "result": result}
+                for filename, image_hash, result in zip(
+                    self.filenames, self.image_hashes, self.results
+                )
+                if result is not None
+            ]
+        return data
+
+
+class ReceiptBatchQueue:
+    """
+    Bounded in-process queue for bulk receipt scanning.
+
+    A batch is accepted only if every image fits in the queue, otherwise
+    ``asyncio.QueueFull`` is raised and nothing is enqueued. A fixed number of
+    worker tasks (one per CPU core by default) drain the queue through
+    ``GeminiReceiptProcessor``, so a big back-fill never runs more OCR at once
+    than the machine has cores and request handlers return immediately.
+    Finished jobs are kept for polling until ``max_jobs`` newer ones exist.
+    """
+
+    def __init__(self, workers=None, queue_size=None, max_jobs=None):
+        self.workers = workers or settings.receipt_batch_workers or os.cpu_count() or 1
+        self.queue_size = queue_size or settings.receipt_batch_queue_size
+        self.max_jobs = max_jobs or settings.receipt_batch_max_jobs
+        self.processor = GeminiReceiptProcessor()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._jobs = OrderedDict()
+        self._tasks = []
+        self._inflight = {}  # image_hash -> Future hasil yang sedang diproses
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"receipt-batch-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(
+            f"Receipt batch queue started with {self.workers} workers, "
+            f"capacity {self.queue_size}"
+        )
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Receipt batch queue stopped")
+
+    def submit(self, images) -> ReceiptBatchJob:
+        """Enqueue ``(filename, image_bytes, image_hash)`` items as one job."""
+        images = list(images)
+        free = self.queue_size - self._queue.qsize()
+        if len(images) > free:
+            raise asyncio.QueueFull(
+                f"Antrean penuh: {len(images)} gambar, sisa kapasitas {free}"
+            )
+
+        job = ReceiptBatchJob(
+            (filename for filename, _, _ in images),
+            (image_hash for _, _, image_hash in images),
+        )
+        self._jobs[job.id] = job
+        self._trim_jobs()
+        # Tanpa await di antaranya, jadi seluruh batch masuk sekaligus
+        for index, (_, image_bytes, image_hash) in enumerate(images):
+            self._queue.put_nowait((job, index, image_bytes, image_hash))
+        logger.info(f"Receipt batch {job.id} queued with {job.total} images")
+        return job
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self.queue_size,
+            "jobs": len(self._jobs),
+        }
+
+    def _trim_jobs(self):
+        # Job lama yang sudah selesai dibuang lebih dulu
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status == DONE:
+                del self._jobs[job_id]
+
+    async def _work(self):
+        while True:
+            job, index, image_bytes, image_hash = await self._queue.get()
+            job.started += 1
+            try:
+                result = await self._process(image_bytes, image_hash)
+            except Exception as e:
+                logger.error(f"Receipt batch {job.id} item {index} failed: {e}")
+                result = {"nama": ERROR_NAME, "deskripsi": f"Error: {e}"}
+            finally:
+                self._queue.task_done()
+            job.complete(index, result)
+            if job.status == DONE:
+                logger.info(
+                    f"Receipt batch {job.id} done: {job.total} images, "
+                    f"{job.failed} failed"
+                )
+
+    async def _process(self, image_bytes: bytes, image_hash: str) -> dict:
+        # Gambar identik yang sedang diproses worker lain cukup ditunggu,
+        # hasil berikutnya datang dari receipt_cache lewat hash yang sama
+        inflight = self._inflight.get(image_hash)
+        if inflight is not None:
+            return copy.deepcopy(await asyncio.shield(inflight))
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[image_hash] = future
+        try:
+            result = await self.processor.process_receipt(
+                image_bytes, image_hash=image_hash
+            )
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Pengecualian sudah diteruskan ke worker yang menunggu
+            future.exception()
+            raise
+        finally:
+            del self._inflight[image_hash]
+
+
+receipt_batch_queue = ReceiptBatchQueue()
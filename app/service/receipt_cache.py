@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def image_digest(image_bytes: bytes) -> str:
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class ReceiptCache:
+    """
+    Persistent LRU cache of processed receipts.
+
+    Entries are found only by exact identity: Telegram ``file_unique_id``
+    (same file resent or forwarded) or the SHA-256 of the image bytes (same
+    file uploaded again). Similar-looking images are never matched, two
+    receipts with the same layout can differ only in their amounts.
+    """
+
+    def __init__(self, db_path=None, max_entries=None):
+        self.db_path = db_path or settings.receipt_cache_path
+        self.max_entries = max_entries or settings.receipt_cache_size
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS receipts (
+                    image_hash TEXT PRIMARY KEY,
+                    file_unique_id TEXT,
+                    result TEXT NOT NULL,
+                    used_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS receipts_file ON receipts (file_unique_id)"
+            )
+
+    def has_file(self, file_unique_id) -> bool:
+        """Whether ``file_unique_id`` is cached, so the download can be skipped."""
+        if not file_unique_id:
+            return False
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM receipts WHERE file_unique_id = ?", (file_unique_id,)
+            ).fetchone()
+        return row is not None
+
+    def get(self, file_unique_id=None, image_hash=None):
+        """Cached result of the receipt, a fresh dict each call, or None."""
+        with self._lock, self._conn:
+            row = None
+            if file_unique_id:
+                row = self._conn.execute(
+                    "SELECT image_hash, result FROM receipts WHERE file_unique_id = ?",
+                    (file_unique_id,),
+                ).fetchone()
+            if row is None and image_hash:
+                row = self._conn.execute(
+                    "SELECT image_hash, result FROM receipts WHERE image_hash = ?",
+                    (image_hash,),
+                ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE receipts SET used_at = ? WHERE image_hash = ?",
+                (time.time(), row[0]),
+            )
+            return json.loads(row[1])
+
+    def put(self, image_hash, result: dict, file_unique_id=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO receipts (image_hash, file_unique_id, result, used_at) "
+                "VALUES (?, ?, ?, ?)",
+                (image_hash, file_unique_id, json.dumps(result), time.time()),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM receipts WHERE image_hash NOT IN (
+                    SELECT image_hash FROM receipts ORDER BY used_at DESC LIMIT ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def reset(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM receipts")
+
+
+receipt_cache = ReceiptCache()
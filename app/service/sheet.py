@@ -1,14 +1,30 @@
 import gspread
+import threading
+import time
 from datetime import datetime
 from app.utils.logger import get_logger
 from google.oauth2.service_account import Credentials
 from app.core.config import settings
+from app.utils.dates import format_sheet_date, has_time, parse_date
+from app.service.aggregates import aggregate_store
 
 logger = get_logger(__name__)
 
+# Kolom H menyimpan ID unik tiap baris agar antrean tidak menulis ganda
+KEY_COLUMN = 8
+KEY_HEADER_CELL = "H1"
+
 
 class SheetsService:
     def __init__(self):
+        # Serializes sheet creation and appends when the shared instance is
+        # used from several handlers at once.
+        self._lock = threading.RLock()
+        # Worksheet handles by title, each with the time it was fetched
+        self._worksheets = {}
+        self._worksheets_listed_at = 0
+        # Sheet yang header kolom ID-nya sudah diperiksa
+        self._key_headers = set()
         self._init_connection()
 
     def _init_connection(self):
@@ -27,65 +43,196 @@ class SheetsService:
             logger.error(f"Google Sheets connection error: {type(e).__name__}: {e}")
             raise e
 
+    def get_worksheet(self, title):
+        """Cached worksheet handle, fetched again once the TTL expires."""
+        with self._lock:
+            cached = self._worksheets.get(title)
+            if cached and time.monotonic() - cached[1] < settings.worksheet_cache_ttl:
+                return cached[0]
+
+            try:
+                worksheet = self.spreadsheet.worksheet(title)
+            except gspread.exceptions.WorksheetNotFound:
+                self._worksheets.pop(title, None)
+                raise
+
+            self._worksheets[title] = (worksheet, time.monotonic())
+            return worksheet
+
+    def list_worksheets(self):
+        """All worksheets, refreshed from the API at most once per TTL."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._worksheets_listed_at >= settings.worksheet_cache_ttl:
+                self._worksheets = {
+                    worksheet.title: (worksheet, now)
+                    for worksheet in self.spreadsheet.worksheets()
+                }
+                self._worksheets_listed_at = now
+            return [worksheet for worksheet, _ in self._worksheets.values()]
+
+    def invalidate_worksheet(self, title=None):
+        """Forget one cached worksheet, or all of them when title is None."""
+        with self._lock:
+            if title is None:
+                self._worksheets = {}
+            else:
+                self._worksheets.pop(title, None)
+            self._worksheets_listed_at = 0
+
     def ensure_year_sheet_exists(self, year=None):
         if year is None:
             year = datetime.now().year
 
         sheet_name = f"Transaksi {year}"
 
-        try:
-            self.spreadsheet.worksheet(sheet_name)
-            return sheet_name
-        except gspread.exceptions.WorksheetNotFound:
-            worksheet = self.spreadsheet.add_worksheet(
-                title=sheet_name, rows=1000, cols=10
-            )
+        with self._lock:
+            try:
+                worksheet = self.get_worksheet(sheet_name)
+                if sheet_name not in self._key_headers:
+                    self._ensure_key_header(worksheet)
+                    self._key_headers.add(sheet_name)
+                return sheet_name
+            except gspread.exceptions.WorksheetNotFound:
+                worksheet = self.spreadsheet.add_worksheet(
+                    title=sheet_name, rows=1000, cols=10
+                )
 
-            headers = [
-                "Tanggal",
-                "Nama",
-                "Jenis",
-                "Sumber",
-                "Kategori",
-                "Jumlah",
-                "Deskripsi",
-            ]
-            worksheet.update("A1:G1", [headers])
-
-            worksheet.format(
-                "A1:G1", {"textFormat": {"bold": True}, "horizontalAlignment": "CENTER"}
-            )
+                headers = [
+                    "Tanggal",
+                    "Nama",
+                    "Jenis",
+                    "Sumber",
+                    "Kategori",
+                    "Jumlah",
+                    "Deskripsi",
+                    "ID",
+                ]
+                worksheet.update("A1:H1", [headers])
 
-            logger.info(f"Created new sheet: {sheet_name}")
-            return sheet_name
+                worksheet.format(
+                    "A1:H1",
+                    {"textFormat": {"bold": True}, "horizontalAlignment": "CENTER"},
+                )
 
-    def add_transaction(self, transaction_data):
-        date_str = transaction_data["tanggal"]
-        # Hilangkan tanda ' di depan tanggal jika ada
-        if isinstance(date_str, str) and date_str.startswith("'"):
-            date_str = date_str.lstrip("'")
-        try:
-            # Ubah format tanggal ke DD/MM/YYYY agar Google Sheets mengenali sebagai tanggal
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-            date_str = date_obj.strftime("%d/%m/%Y")
-            year = date_obj.year
-        except Exception:
-            year = datetime.now().year
+                self._worksheets[sheet_name] = (worksheet, time.monotonic())
+                self._key_headers.add(sheet_name)
+                logger.info(f"Created new sheet: {sheet_name}")
+                return sheet_name
 
-        sheet_name = self.ensure_year_sheet_exists(year)
-        worksheet = self.spreadsheet.worksheet(sheet_name)
-
-        row_data = [
-            date_str,  # Tanggal sudah dibersihkan dari tanda '
-            transaction_data["nama"],
-            transaction_data["jenis"],
-            transaction_data["sumber"],
-            transaction_data["kategori"],
-            transaction_data["jumlah"],  # integer
-            transaction_data["deskripsi"],
-        ]
+    def _ensure_key_header(self, worksheet):
+        """
+        Give sheets created before the ID column its header, so the rows the
+        transaction queue writes there can be recognized during recovery.
+        """
+        header = worksheet.get_values(KEY_HEADER_CELL)
+        value = header[0][0] if header and header[0] else ""
+        if not value:
+            worksheet.update(KEY_HEADER_CELL, [["ID"]])
+            logger.info(f"Added ID column header to {worksheet.title}")
+        elif value != "ID":
+            logger.warning(
+                f"Column H of {worksheet.title} is {value!r}, transaction IDs "
+                "written there may mix with other data"
+            )
 
-        worksheet.append_row(row_data, value_input_option="USER_ENTERED")
+    def add_transaction(self, transaction_data):
+        sheet_name, row_data = build_transaction_row(transaction_data)
+        self.append_rows(sheet_name, [row_data])
         logger.info(f"Added new transaction for {transaction_data['nama']}")
 
         return True
+
+    def append_rows(self, sheet_name, rows):
+        """
+        Append several rows to one year sheet with a single API call and
+        fold them into the monthly aggregates.
+        """
+        year = int(sheet_name.split()[-1])
+        with self._lock:
+            self.ensure_year_sheet_exists(year)
+            try:
+                self.get_worksheet(sheet_name).append_rows(
+                    rows, value_input_option="USER_ENTERED"
+                )
+            except gspread.exceptions.APIError as e:
+                # Handle lama bisa basi jika sheet dihapus/dibuat ulang manual,
+                # error lain (kuota, izin, server) tidak diulang di sini
+                if not is_missing_worksheet_error(e):
+                    raise
+                self.invalidate_worksheet(sheet_name)
+                self.ensure_year_sheet_exists(year)
+                self.get_worksheet(sheet_name).append_rows(
+                    rows, value_input_option="USER_ENTERED"
+                )
+
+        aggregate_store.add_rows(sheet_name, rows)
+
+    def get_row_keys(self, sheet_name):
+        """Idempotency keys already written to a year sheet, empty if it is gone."""
+        with self._lock:
+            try:
+                try:
+                    return set(self.get_worksheet(sheet_name).col_values(KEY_COLUMN))
+                except gspread.exceptions.APIError as e:
+                    if not is_missing_worksheet_error(e):
+                        raise
+                    # Handle basi, sheet mungkin sudah dibuat ulang
+                    self.invalidate_worksheet(sheet_name)
+                    return set(self.get_worksheet(sheet_name).col_values(KEY_COLUMN))
+            except gspread.exceptions.WorksheetNotFound:
+                # Sheet belum ada atau dihapus, jadi belum ada baris tertulis
+                return set()
+
+
+def is_missing_worksheet_error(error: gspread.exceptions.APIError) -> bool:
+    """True when ``error`` means the worksheet is gone or was recreated."""
+    if error.code == 404:
+        return True
+    return error.code == 400 and "Unable to parse range" in str(
+        error.error.get("message", "")
+    )
+
+
+def build_transaction_row(transaction_data, key=""):
+    """Map a transaction dict to its target sheet name and row values."""
+    date_str = transaction_data["tanggal"]
+    # Hilangkan tanda ' di depan tanggal jika ada
+    if isinstance(date_str, str) and date_str.startswith("'"):
+        date_str = date_str.lstrip("'")
+    date_obj = parse_date(date_str) if isinstance(date_str, str) else None
+    if date_obj:
+        # Ubah format tanggal ke DD/MM/YYYY agar Google Sheets mengenali sebagai
+        # tanggal, jam dari input ikut disimpan
+        date_str = format_sheet_date(date_obj, has_time(date_str))
+        year = date_obj.year
+    else:
+        year = datetime.now().year
+
+    row_data = [
+        date_str,  # Tanggal sudah dibersihkan dari tanda '
+        transaction_data["nama"],
+        transaction_data["jenis"],
+        transaction_data["sumber"],
+        transaction_data["kategori"],
+        transaction_data["jumlah"],  # integer
+        transaction_data["deskripsi"],
+    ]
+    if key:
+        row_data.append(key)
+
+    return f"Transaksi {year}", row_data
+
+
+_sheets_service = None
+_sheets_service_lock = threading.Lock()
+
+
+def get_sheets_service() -> SheetsService:
+    """Shared SheetsService, authorized once and reused by every handler."""
+    global _sheets_service
+    if _sheets_service is None:
+        with _sheets_service_lock:
+            if _sheets_service is None:
+                _sheets_service = SheetsService()
+    return _sheets_service
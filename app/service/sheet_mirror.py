@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SheetMirror:
+    """
+    Local SQLite copy of the ``Transaksi {year}`` sheets.
+
+    Transactions are append-only, so each sync only requests the rows after
+    the last row count seen for that sheet. A full reload still happens every
+    ``full_sync_interval`` seconds to pick up manual edits in the sheet; it
+    stores a content hash of the reloaded rows as the sheet's ``version``.
+    """
+
+    def __init__(self, db_path=None, sync_interval=None, full_sync_interval=None):
+        self.db_path = db_path or settings.sheet_mirror_path
+        self.sync_interval = (
+            settings.sheet_mirror_sync_interval
+            if sync_interval is None
+            else sync_interval
+        )
+        self.full_sync_interval = (
+            settings.sheet_mirror_full_sync_interval
+            if full_sync_interval is None
+            else full_sync_interval
+        )
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sheets (
+                    title TEXT PRIMARY KEY,
+                    row_count INTEGER NOT NULL,
+                    synced_at REAL NOT NULL,
+                    full_synced_at REAL NOT NULL,
+                    content_hash TEXT
+                )
+                """
+            )
+            columns = {
+                row[1] for row in self._conn.execute("PRAGMA table_info(sheets)")
+            }
+            if "content_hash" not in columns:
+                self._conn.execute("ALTER TABLE sheets ADD COLUMN content_hash TEXT")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rows (
+                    title TEXT NOT NULL,
+                    row_number INTEGER NOT NULL,
+                    row_values TEXT NOT NULL,
+                    PRIMARY KEY (title, row_number)
+                )
+                """
+            )
+
+    def sync(self, worksheet) -> int:
+        """Fetch rows added since the last sync, returns how many were new."""
+        title = worksheet.title
+        now = time.time()
+
+        with self._lock:
+            state = self._conn.execute(
+                "SELECT row_count, synced_at, full_synced_at FROM sheets WHERE title = ?",
+                (title,),
+            ).fetchone()
+
+        if state and now - state[1] < self.sync_interval:
+            return 0
+
+        if not state or now - state[2] >= self.full_sync_interval:
+            values = worksheet.get_all_values()
+            self._replace(title, values, now)
+            logger.info(f"Mirror reloaded {title}: {len(values)} rows")
+            return len(values)
+
+        row_count = state[0]
+        values = worksheet.get_values(f"A{row_count + 1}:Z")
+        while values and not any(values[-1]):
+            values.pop()
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rows (title, row_number, row_values) VALUES (?, ?, ?)",
+                [
+                    (title, row_count + offset + 1, json.dumps(row))
+                    for offset, row in enumerate(values)
+                ],
+            )
+            self._conn.execute(
+                "UPDATE sheets SET row_count = ?, synced_at = ? WHERE title = ?",
+                (row_count + len(values), now, title),
+            )
+
+        if values:
+            logger.info(f"Mirror synced {title}: {len(values)} new rows")
+        return len(values)
+
+    def row_count(self, title) -> int:
+        """Rows mirrored for ``title``, header included."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT row_count FROM sheets WHERE title = ?", (title,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def version(self, title):
+        """Content hash of ``title`` at its last full reload, None if never loaded."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM sheets WHERE title = ?", (title,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_values(self, title):
+        """Rows of a mirrored sheet, header first, like ``get_all_values``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT row_values FROM rows WHERE title = ? ORDER BY row_number",
+                (title,),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_all_values(self, worksheet):
+        """Sync ``worksheet`` and return its mirrored rows."""
+        self.sync(worksheet)
+        return self.get_values(worksheet.title)
+
+    def mark_stale(self, title):
+        """Make the next sync of ``title`` hit the sheet regardless of interval."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE sheets SET synced_at = 0 WHERE title = ?", (title,)
+            )
+
+    def reset(self, title=None):
+        """Drop mirrored data so the next sync reloads the whole sheet."""
+        with self._lock, self._conn:
+            if title is None:
+                self._conn.execute("DELETE FROM rows")
+                self._conn.execute("DELETE FROM sheets")
+            else:
+                self._conn.execute("DELETE FROM rows WHERE title = ?", (title,))
+                self._conn.execute("DELETE FROM sheets WHERE title = ?", (title,))
+
+    def _replace(self, title, values, synced_at):
+        encoded = [json.dumps(row) for row in values]
+        content_hash = hashlib.sha256("\n".join(encoded).encode()).hexdigest()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM rows WHERE title = ?", (title,))
+            self._conn.executemany(
+                "INSERT INTO rows (title, row_number, row_values) VALUES (?, ?, ?)",
+                [
+                    (title, row_number, row)
+                    for row_number, row in enumerate(encoded, start=1)
+                ],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sheets "
+                "(title, row_count, synced_at, full_synced_at, content_hash) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (title, len(values), synced_at, synced_at, content_hash),
+            )
+
+
+sheet_mirror = SheetMirror()
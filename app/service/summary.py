@@ -5,82 +5,121 @@ from datetime import datetime
 from typing import Dict, List, Any
 from app.utils.logger import get_logger
 from app.core.config import settings
-from app.service.sheet import SheetsService
+from app.service.sheet import get_sheets_service
+from app.service.sheet_mirror import sheet_mirror
+from app.service.aggregates import aggregate_store
+from app.utils.ledger import LedgerArrays
+from app.utils.trace import RequestTrace
 
 logger = get_logger(__name__)
 
 
 class SummaryGenerator:
     def __init__(self):
-        self.sheets_service = SheetsService()
         logger.info("Summary Generator initialized")
 
-        # Kamus untuk menerjemahkan nama bulan bahasa Indonesia ke angka
-        self.month_id_to_number = {
-            "januari": 1,
-            "februari": 2,
-            "maret": 3,
-            "april": 4,
-            "mei": 5,
-            "juni": 6,
-            "juli": 7,
-            "agustus": 8,
-            "september": 9,
-            "oktober": 10,
-            "november": 11,
-            "desember": 12,
-        }
-
-    def parse_indonesian_date(self, date_str):
-        """Parse tanggal dengan format Indonesia seperti 'Agustus 31, 2025'"""
-        try:
-            parts = date_str.replace(",", "").split()
-            if len(parts) != 3:
-                return None
-
-            month_name, day, year = parts
-            month_number = self.month_id_to_number.get(month_name.lower())
-            if not month_number:
-                return None
-
-            day = int(day)
-            year = int(year)
+    @property
+    def sheets_service(self):
+        return get_sheets_service()
+
+    def _load_ledger(self, title, trace):
+        """Typed columns of the mirrored rows of ``title``."""
+        all_data = sheet_mirror.get_values(title)
+        headers = all_data[0]
+        data = all_data[1:]
+        trace.log("Headers: %s", headers)
+
+        # Find column indices
+        date_idx = headers.index("Tanggal") if "Tanggal" in headers else 0
+        amount_idx = headers.index("Jumlah") if "Jumlah" in headers else 5
+        type_idx = headers.index("Jenis") if "Jenis" in headers else 2
+        category_idx = headers.index("Kategori") if "Kategori" in headers else 4
+        source_idx = headers.index("Sumber") if "Sumber" in headers else 3
+        trace.log(
+            "Column indices - Date: %s, Amount: %s, Type: %s, Category: %s, Source: %s",
+            date_idx,
+            amount_idx,
+            type_idx,
+            category_idx,
+            source_idx,
+        )
+
+        # Tampilkan sampel data untuk debugging
+        if data:
+            trace.log("Sample data row: %s", data[0])
+
+        return LedgerArrays(
+            data, date_idx, amount_idx, type_idx, category_idx, source_idx
+        )
+
+    def rebuild_aggregates(self, year: int = None) -> Dict[str, int]:
+        """
+        Reload the transaction sheets into the mirror and recompute their
+        aggregates, returns the number of data rows per rebuilt sheet.
+        """
+        rebuilt = {}
+        for worksheet in self.sheets_service.list_worksheets():
+            if not worksheet.title.startswith("Transaksi"):
+                continue
+            if year is not None and worksheet.title != f"Transaksi {year}":
+                continue
+
+            sheet_mirror.reset(worksheet.title)
+            sheet_mirror.sync(worksheet)
+            if not sheet_mirror.row_count(worksheet.title):
+                continue
+
+            data_rows = sheet_mirror.row_count(worksheet.title) - 1
+            ledger = self._load_ledger(
+                worksheet.title, RequestTrace(logger, f"rebuild {worksheet.title}")
+            )
+            aggregate_store.rebuild(
+                worksheet.title,
+                ledger,
+                data_rows,
+                sheet_mirror.version(worksheet.title),
+            )
+            rebuilt[worksheet.title] = data_rows
 
-            return datetime(year, month_number, day)
-        except Exception as e:
-            logger.debug(f"Error parsing Indonesian date: {e}")
-            return None
+        return rebuilt
 
-    async def get_monthly_summary(self, year: int, month: int) -> Dict[str, Any]:
+    async def get_monthly_summary(
+        self, year: int, month: int, trace: RequestTrace = None
+    ) -> Dict[str, Any]:
         """
         Generate financial summary for a specific month and year.
 
         Args:
             year (int): Year for the summary
             month (int): Month for the summary (1-12)
+            trace (RequestTrace): Detail logging for this request, only
+                emitted when enabled
 
         Returns:
             Dict with status and analysis results
         """
+        if trace is None:
+            trace = RequestTrace(logger, f"summary {month}/{year}")
+
         try:
             # Log parameter yang diterima fungsi
-            logger.info(f"Generating summary for year: {year}, month: {month}")
+            trace.log("Generating summary for year: %s, month: %s", year, month)
 
             # Get all worksheets to find the appropriate transaction sheet
-            all_sheets = self.sheets_service.spreadsheet.worksheets()
+            all_sheets = self.sheets_service.list_worksheets()
             sheet_name = f"Transaksi {year}"
-            logger.info(f"Looking for sheet: '{sheet_name}'")
+            trace.log("Looking for sheet: '%s'", sheet_name)
 
             # Log semua sheet yang tersedia
-            available_sheets = [sheet.title for sheet in all_sheets]
-            logger.info(f"Available sheets: {available_sheets}")
+            if trace.enabled:
+                trace.log("Available sheets: %s", [sheet.title for sheet in all_sheets])
 
             # Check if there's a sheet for the requested year
             worksheet = None
             for sheet in all_sheets:
                 if sheet.title == sheet_name:
                     worksheet = sheet
-                    logger.info(f"Found matching sheet: {sheet.title}")
+                    trace.log("Found matching sheet: %s", sheet.title)
                     break
 
             if not worksheet:
@@ -108,114 +147,73 @@ class SummaryGenerator:
                     if worksheet.title.split()[-1].isdigit()
                     else year
                 )
-                logger.info(
-                    f"Using alternative sheet: {worksheet.title} for requested year {year}"
+                trace.log(
+                    "Using alternative sheet: %s for requested year %s",
+                    worksheet.title,
+                    year,
                 )
 
-            # Get all data
-            all_data = worksheet.get_all_values()
-            logger.info(
-                f"Retrieved {len(all_data) - 1 if len(all_data) > 0 else 0} data rows"
-            )
-
-            if len(all_data) <= 1:  # Only headers, no data
-                logger.info("Sheet is empty (only contains headers)")
+            # Sync the local mirror, only new rows are fetched from the sheet
+            try:
+                sheet_mirror.sync(worksheet)
+            except gspread.exceptions.APIError:
+                # Cached handle may point to a deleted sheet, refetch next time
+                self.sheets_service.invalidate_worksheet()
+                raise
+            data_rows = max(sheet_mirror.row_count(worksheet.title) - 1, 0)
+            trace.mark("sync")
+            trace.log("Sheet has %s data rows", data_rows)
+
+            if not data_rows:  # Only headers, no data
+                trace.log("Sheet is empty (only contains headers)")
                 return {
                     "status": "empty",
                     "message": f"Belum ada transaksi yang tercatat.",
                 }
 
-            headers = all_data[0]
-            data = all_data[1:]
-            logger.info(f"Headers: {headers}")
-            logger.info(f"Total rows of data: {len(data)}")
-
-            # Find column indices
-            date_idx = headers.index("Tanggal") if "Tanggal" in headers else 0
-            amount_idx = headers.index("Jumlah") if "Jumlah" in headers else 5
-            type_idx = headers.index("Jenis") if "Jenis" in headers else 2
-            category_idx = headers.index("Kategori") if "Kategori" in headers else 4
-            logger.info(
-                f"Column indices - Date: {date_idx}, Amount: {amount_idx}, Type: {type_idx}, Category: {category_idx}"
+            # Totals come from the aggregate store, rows are only loaded and
+            # converted when it has drifted from the sheet (or for tracing).
+            # A full mirror reload with changed content means the sheet was
+            # edited by hand, the row count alone would not show that.
+            ledger = None
+            version = sheet_mirror.version(worksheet.title)
+            rebuilt = (
+                aggregate_store.row_count(worksheet.title) != data_rows
+                or aggregate_store.source_version(worksheet.title) != version
+            )
+            if rebuilt or trace.enabled:
+                ledger = self._load_ledger(worksheet.title, trace)
+            if rebuilt:
+                aggregate_store.rebuild(worksheet.title, ledger, data_rows, version)
+                trace.mark("rebuild")
+
+            (
+                transaction_count,
+                total_income,
+                total_expense,
+                category_totals,
+                income_categories,
+            ) = aggregate_store.month_totals(worksheet.title, year, month)
+            trace.mark("aggregate")
+
+            if trace.enabled:
+                if ledger.unparsed_dates:
+                    trace.log("Couldn't parse dates: %s", ledger.unparsed_dates)
+                for row in ledger.month_rows(year, month):
+                    trace.log("Match found: %s", row)
+
+            stats = (
+                f"skipped={ledger.skipped_rows} unparsed_dates={len(ledger.unparsed_dates)} "
+                if rebuilt
+                else ""
             )
-
-            # Tampilkan sampel data untuk debugging
-            if data:
-                logger.info(f"Sample data row: {data[0]}")
-
-            # Filter data for the specific month
-            month_data = []
-            for row_idx, row in enumerate(data):
-                if len(row) <= max(date_idx, amount_idx, type_idx, category_idx):
-                    logger.warning(
-                        f"Row {row_idx + 2} skipped: not enough columns. Row data: {row}"
-                    )
-                    continue  # Skip rows that don't have enough columns
-
-                date_str = row[date_idx].strip()
-                logger.info(f"Processing row {row_idx + 2}, date: '{date_str}'")
-
-                # Handle various date formats
-                try:
-                    date_obj = None
-
-                    # Coba parse tanggal dengan format Indonesia terlebih dahulu
-                    date_obj = self.parse_indonesian_date(date_str)
-                    if date_obj:
-                        logger.info(
-                            f"Date '{date_str}' parsed with Indonesian format => {date_obj}"
-                        )
-                    else:
-                        formats_tried = []
-                        # Coba parse berbagai format tanggal standar
-                        formats_to_try = [
-                            "%d/%m/%Y",  # DD/MM/YYYY
-                            "%Y-%m-%d",  # YYYY-MM-DD
-                            "%d-%m-%Y",  # DD-MM-YYYY
-                            "%d %B %Y",  # DD Month YYYY
-                            "%d %b %Y",  # DD Mon YYYY
-                            "%Y/%m/%d",  # YYYY/MM/DD
-                        ]
-
-                        for date_format in formats_to_try:
-                            try:
-                                formats_tried.append(date_format)
-                                date_obj = datetime.strptime(date_str, date_format)
-                                logger.info(
-                                    f"Date '{date_str}' parsed with format '{date_format}' => {date_obj}"
-                                )
-                                break
-                            except ValueError:
-                                continue
-
-                    if not date_obj:
-                        logger.warning(
-                            f"Couldn't parse date: '{date_str}'. Tried formats: {formats_tried}"
-                        )
-                        continue
-
-                    row_month = date_obj.month
-                    row_year = date_obj.year
-                    logger.info(
-                        f"Date info - month: {row_month}, year: {row_year} (looking for month: {month}, year: {year})"
-                    )
-
-                    if row_month == month and row_year == year:
-                        logger.info(f"Match found! Adding row to month data: {row}")
-                        month_data.append(row)
-                    else:
-                        logger.info(f"Not a match for requested month/year")
-
-                except Exception as e:
-                    # Skip rows with unparseable dates
-                    logger.error(f"Error with date '{date_str}': {e}")
-                    continue
-
             logger.info(
-                f"Filtered data: found {len(month_data)} transactions for {month}/{year}"
+                f"Summary {month}/{year} from {worksheet.title}: rows={data_rows} "
+                f"matched={transaction_count} rebuilt={rebuilt} {stats}"
+                f"{trace.format_timings()}"
             )
 
-            if not month_data:
+            if not transaction_count:
                 # Get month name in Indonesian
                 month_names_id = {
                     1: "Januari",
@@ -233,56 +231,12 @@ class SummaryGenerator:
                 }
                 month_name = month_names_id.get(month, "Unknown")
 
-                logger.info(f"No transactions found for {month_name} {year}")
+                trace.log("No transactions found for %s %s", month_name, year)
                 return {
                     "status": "empty",
                     "message": f"Belum ada transaksi yang tercatat untuk {month_name} {year}. Gunakan /add untuk menambahkan transaksi baru!",
                 }
 
-            # Calculate summary statistics
-            total_income = 0
-            total_expense = 0
-            category_totals = {}
-
-            for row_idx, row in enumerate(month_data):
-                try:
-                    amount_str = (
-                        row[amount_idx].replace(".", "").replace(",", "").strip()
-                    )
-                    amount = int(amount_str) if amount_str.isdigit() else 0
-                    logger.info(
-                        f"Processing amount for row {row_idx + 1}: '{amount_str}' => {amount}"
-                    )
-
-                    transaction_type = row[type_idx].lower()
-                    logger.info(f"Transaction type: '{transaction_type}'")
-
-                    if transaction_type == "pemasukan":
-                        total_income += amount
-                        logger.info(
-                            f"Added to income: {amount} (total: {total_income})"
-                        )
-                    else:  # Pengeluaran
-                        total_expense += amount
-                        logger.info(
-                            f"Added to expense: {amount} (total: {total_expense})"
-                        )
-
-                        # Track category totals for expenses
-                        category = row[category_idx]
-                        if category not in category_totals:
-                            category_totals[category] = 0
-                        category_totals[category] += amount
-                        logger.info(
-                            f"Updated category '{category}': {category_totals[category]}"
-                        )
-
-                except (ValueError, IndexError) as e:
-                    logger.error(
-                        f"Error processing amount or category in row {row_idx + 1}: {e}"
-                    )
-                    continue
-
             # Sort categories by amount (descending)
             sorted_categories = sorted(
                 category_totals.items(), key=lambda x: x[1], reverse=True
@@ -331,7 +285,7 @@ class SummaryGenerator:
                     )
 
             # Add transaction count
-            analysis.append(f"\n📝 *Total Transaksi:* {len(month_data)}")
+            analysis.append(f"\n📝 *Total Transaksi:* {transaction_count}")
 
             # Get month name in Indonesian
             month_names_id = {
@@ -350,8 +304,10 @@ class SummaryGenerator:
             }
             month_name = month_names_id.get(month, "Unknown")
 
-            logger.info(
-                f"Summary generated successfully - Income: {total_income}, Expense: {total_expense}"
+            trace.log(
+                "Summary generated successfully - Income: %s, Expense: %s",
+                total_income,
+                total_expense,
             )
 
             return {
@@ -363,6 +319,8 @@ class SummaryGenerator:
                     "expense": total_expense,
                     "balance": balance,
                     "categories": dict(sorted_categories),
+                    "income_categories": income_categories,
+                    "transaction_count": transaction_count,
                 },
             }
 
@@ -0,0 +1,261 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from app.core.config import settings
+from app.utils.api import telegram_post
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+GLOBAL = None  # antrean untuk panggilan yang tidak terikat ke satu chat
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available, 0 if it is available now."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class OutboundRequest:
+    def __init__(self, method: str, data: dict, chat_id, future):
+        self.method = method
+        self.data = data
+        self.chat_id = chat_id
+        self.future = future
+        self.attempts = 0
+
+    @property
+    def edit_key(self):
+        if self.method == "editMessageText" and "message_id" in self.data:
+            return self.chat_id, self.data["message_id"]
+        return None
+
+
+class TelegramDispatcher:
+    """
+    Rate-limited outbound queue for Telegram Bot API calls.
+
+    Every call waits for a token from the global bucket (about 30 messages
+    per second) and, when it targets a chat, from that chat's bucket (about
+    one per second with a short burst). Calls to one chat go out in order
+    and one at a time; chats are served round-robin so a busy chat does not
+    starve the others. A 429 answer pauses the chat (or every chat, for
+    calls without one) for ``retry_after`` seconds and the call is retried.
+    An ``editMessageText`` that is still queued is overwritten by a newer
+    edit of the same message, and both callers get the result of the one
+    request that is sent.
+    """
+
+    def __init__(
+        self, global_rate=None, chat_rate=None, chat_burst=None, max_retries=None
+    ):
+        self.base_url = f"https://api.telegram.org/bot{settings.telegram_bot_token}"
+        global_rate = global_rate or settings.telegram_global_rate
+        self.chat_rate = chat_rate or settings.telegram_chat_rate
+        self.chat_burst = chat_burst or settings.telegram_chat_burst
+        self.max_retries = max_retries or settings.telegram_max_retries
+        self._global_bucket = TokenBucket(global_rate, global_rate)
+        self._global_paused_until = 0.0
+
+        self._queues = OrderedDict()  # chat_id -> deque, urutan round-robin
+        self._buckets = {}
+        self._paused_until = {}
+        self._busy = set()
+        self._pending_edits = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._inflight = set()
+
+        self.sent = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self.max_depth = 0
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="telegram-dispatcher")
+            logger.info("Telegram dispatcher started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, *self._inflight, return_exceptions=True)
+        self._task = None
+        for queue in self._queues.values():
+            for request in queue:
+                if not request.future.done():
+                    request.future.cancel()
+        self._queues.clear()
+        self._pending_edits.clear()
+        logger.info("Telegram dispatcher stopped")
+
+    async def call(self, method: str, data: dict, chat_id=GLOBAL) -> dict:
+        """Queue a Bot API call and wait for Telegram's JSON answer."""
+        await self.start()
+        return await self.submit(method, data, chat_id)
+
+    def submit(self, method: str, data: dict, chat_id=GLOBAL) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        request = OutboundRequest(method, data, chat_id, future)
+
+        key = request.edit_key
+        pending = self._pending_edits.get(key) if key else None
+        if pending is not None:
+            # Edit yang belum terkirim cukup diganti isinya
+            pending.data = data
+            self.coalesced += 1
+            return asyncio.shield(pending.future)
+        if key:
+            self._pending_edits[key] = request
+
+        self._queues.setdefault(chat_id, deque()).append(request)
+        self.max_depth = max(self.max_depth, self.depth())
+        self._wakeup.set()
+        return request.future
+
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.depth(),
+            "max_queue_depth": self.max_depth,
+            "chats_waiting": sum(1 for queue in self._queues.values() if queue),
+            "deepest_chat": max((len(q) for q in self._queues.values()), default=0),
+            "inflight": len(self._inflight),
+            "sent": self.sent,
+            "coalesced_edits": self.coalesced,
+            "rate_limited": self.rate_limited,
+            "failed": self.failed,
+        }
+
+    async def _run(self):
+        while True:
+            wait = self._dispatch_ready()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch_ready(self):
+        """Send every call allowed right now; return seconds until the next one."""
+        now = time.monotonic()
+        wait = None
+        for chat_id in list(self._queues):
+            queue = self._queues[chat_id]
+            if not queue and chat_id not in self._busy:
+                del self._queues[chat_id]
+                continue
+
+            # Per chat satu panggilan sekaligus supaya urutannya terjaga,
+            # panggilan tanpa chat hanya dibatasi bucket global
+            while queue and chat_id not in self._busy:
+                delay = max(
+                    self._global_paused_until - now,
+                    self._paused_until.get(chat_id, 0.0) - now,
+                    self._global_bucket.wait_time(now),
+                    (
+                        0
+                        if chat_id is GLOBAL
+                        else self._chat_bucket(chat_id).wait_time(now)
+                    ),
+                )
+                if delay > 0:
+                    wait = delay if wait is None else min(wait, delay)
+                    break
+
+                self._global_bucket.take()
+                if chat_id is not GLOBAL:
+                    self._chat_bucket(chat_id).take()
+                    self._busy.add(chat_id)
+                    # Chat ini pindah ke akhir giliran
+                    self._queues.move_to_end(chat_id)
+                request = queue.popleft()
+                if request.edit_key:
+                    self._pending_edits.pop(request.edit_key, None)
+                task = asyncio.create_task(self._send(request))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+        if len(self._buckets) > settings.telegram_idle_chats:
+            self._forget_idle_chats(now)
+        return wait
+
+    def _forget_idle_chats(self, now: float):
+        for chat_id in list(self._buckets):
+            if chat_id in self._queues or self._paused_until.get(chat_id, 0.0) > now:
+                continue
+            bucket = self._buckets[chat_id]
+            bucket.wait_time(now)
+            if bucket.tokens >= bucket.capacity:
+                del self._buckets[chat_id]
+                self._paused_until.pop(chat_id, None)
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(
+                self.chat_rate, self.chat_burst
+            )
+        return bucket
+
+    async def _send(self, request: OutboundRequest):
+        chat_id = request.chat_id
+        try:
+            request.attempts += 1
+            result = await telegram_post(
+                f"{self.base_url}/{request.method}", request.data
+            )
+            retry_after = (
+                (result.get("parameters") or {}).get("retry_after")
+                if result.get("error_code") == 429
+                else None
+            )
+            if retry_after is not None and request.attempts <= self.max_retries:
+                self.rate_limited += 1
+                logger.warning(
+                    f"Telegram {request.method} to {chat_id} rate limited, "
+                    f"retry after {retry_after}s"
+                )
+                until = time.monotonic() + retry_after
+                if chat_id is GLOBAL:
+                    self._global_paused_until = until
+                else:
+                    self._paused_until[chat_id] = until
+                self._queues.setdefault(chat_id, deque()).appendleft(request)
+                if request.edit_key:
+                    self._pending_edits.setdefault(request.edit_key, request)
+                return
+
+            if result.get("ok"):
+                self.sent += 1
+            else:
+                self.failed += 1
+            if not request.future.done():
+                request.future.set_result(result)
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Telegram {request.method} to {chat_id} failed: {e}")
+            if not request.future.done():
+                request.future.set_exception(e)
+        finally:
+            self._busy.discard(chat_id)
+            self._wakeup.set()
+
+
+telegram_dispatcher = TelegramDispatcher()
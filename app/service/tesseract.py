@@ -0,0 +1,143 @@
+import csv
+import io
+import os
+import queue
+import threading
+import numpy as np
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+# Pass-pass Tesseract berjalan paralel, jadi tiap instance cukup satu thread
+# OpenMP agar core tidak saling berebut. Harus diset sebelum libtesseract dimuat.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+import tesserocr  # noqa: E402
+
+logger = get_logger(__name__)
+
+LANG = "eng+ind"
+TSV_COLUMNS = (
+    "level",
+    "page_num",
+    "block_num",
+    "par_num",
+    "line_num",
+    "word_num",
+    "left",
+    "top",
+    "width",
+    "height",
+    "conf",
+    "text",
+)
+
+
+class TesseractEngine:
+    """
+    Pool of long-lived Tesseract instances shared by every ``OCRService``.
+
+    ``start`` creates ``workers`` ``tesserocr.PyTessBaseAPI`` instances, so
+    the language data is loaded once per instance instead of once per pass.
+    A pass borrows an idle instance, hands it the grayscale buffer in
+    memory (no PNG encode, temp file or ``tesseract`` process), sets the
+    page segmentation mode and gives it back. tesserocr releases the GIL
+    while recognizing, so the ``ocr_executor`` threads run passes in
+    parallel. ``stop`` waits for borrowed instances and frees them all.
+    """
+
+    def __init__(self, lang=LANG, workers=None, path=None):
+        self.lang = lang
+        self.workers = workers or settings.ocr_workers or os.cpu_count() or 1
+        self.path = settings.ocr_tessdata_path if path is None else path
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def start(self):
+        """Load every instance up front so the first scans don't pay for it."""
+        apis = []
+        while self._reserve():
+            try:
+                apis.append(self._new_api())
+            except RuntimeError as e:
+                # Bot tetap jalan untuk input manual, scan akan mencoba lagi
+                self._unreserve()
+                logger.error(f"Could not load Tesseract {self.lang}: {e}")
+                break
+        for api in apis:
+            self._idle.put(api)
+        logger.info(f"Tesseract engine started with {len(apis)} workers")
+
+    def stop(self):
+        """Wait for borrowed instances to come back and free every instance."""
+        with self._lock:
+            count, self._created = self._created, 0
+        for _ in range(count):
+            self._idle.get().End()
+        logger.info(f"Tesseract engine stopped, {count} workers freed")
+
+    def image_to_data(self, image: np.ndarray, psm: int) -> dict:
+        """Words of a grayscale ``image`` in the ``pytesseract.Output.DICT`` layout."""
+        api = self._borrow()
+        try:
+            api.SetPageSegMode(psm)
+            # Buffer grayscale diberikan langsung, tanpa encode ke PNG
+            height, width = image.shape
+            api.SetImageBytes(
+                np.ascontiguousarray(image).tobytes(), width, height, 1, width
+            )
+            tsv = api.GetTSVText(0)
+            api.Clear()
+        finally:
+            self._idle.put(api)
+        return self._parse_tsv(tsv)
+
+    def _reserve(self) -> bool:
+        with self._lock:
+            if self._created >= self.workers:
+                return False
+            self._created += 1
+            return True
+
+    def _unreserve(self):
+        with self._lock:
+            self._created -= 1
+
+    def _borrow(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        if not self._reserve():
+            return self._idle.get()
+        try:
+            return self._new_api()
+        except RuntimeError:
+            self._unreserve()
+            raise
+
+    def _new_api(self):
+        kwargs = {"path": self.path} if self.path else {}
+        api = tesserocr.PyTessBaseAPI(
+            lang=self.lang,
+            oem=tesserocr.OEM.DEFAULT,
+            variables={"preserve_interword_spaces": "1"},
+            **kwargs,
+        )
+        logger.info(f"Loaded Tesseract worker {self.lang} from {api.GetDatapath()}")
+        return api
+
+    @staticmethod
+    def _parse_tsv(tsv: str) -> dict:
+        data = {column: [] for column in TSV_COLUMNS}
+        reader = csv.reader(io.StringIO(tsv), delimiter="\t", quoting=csv.QUOTE_NONE)
+        for row in reader:
+            if len(row) < len(TSV_COLUMNS):
+                row += [""] * (len(TSV_COLUMNS) - len(row))
+            for column, value in zip(TSV_COLUMNS[:-1], row):
+                data[column].append(float(value) if column == "conf" else int(value))
+            data["text"].append(row[-1])
+        return data
+
+
+tesseract_engine = TesseractEngine()
@@ -0,0 +1,257 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from app.core.config import settings
+from app.service.sheet import build_transaction_row, get_sheets_service
+from app.service.sheet_mirror import sheet_mirror
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PENDING = "pending"
+INFLIGHT = "inflight"
+
+
+class TransactionQueue:
+    """
+    Write-behind journal for confirmed transactions.
+
+    Rows are committed to a local SQLite journal before the user gets a
+    reply, then a background thread flushes them with one ``append_rows``
+    call per year sheet. Each row carries a unique key in the ID column so a
+    flush interrupted between the Sheets write and the journal update is
+    recognized on restart instead of being written twice. The same holds
+    for a failed ``append_rows``: the request may still have reached the
+    sheet, so its rows stay in flight until their keys have been checked.
+    Rows that cannot be checked ``verify_attempts`` times in a row are
+    requeued anyway, a possible duplicate is better than a lost row.
+    """
+
+    def __init__(
+        self, db_path=None, batch_size=None, flush_interval=None, verify_attempts=None
+    ):
+        self.db_path = db_path or settings.transaction_queue_path
+        self.batch_size = batch_size or settings.transaction_queue_batch_size
+        self.verify_attempts = (
+            verify_attempts or settings.transaction_queue_verify_attempts
+        )
+        self.flush_interval = (
+            flush_interval or settings.transaction_queue_flush_interval
+        )
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS journal (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT UNIQUE NOT NULL,
+                    sheet_name TEXT NOT NULL,
+                    row TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    created_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            columns = {
+                row[1] for row in self._conn.execute("PRAGMA table_info(journal)")
+            }
+            if "attempts" not in columns:
+                self._conn.execute(
+                    "ALTER TABLE journal ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0"
+                )
+
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+
+    def enqueue(self, transaction_data) -> str:
+        """Persist a transaction locally and return its idempotency key."""
+        key = uuid.uuid4().hex
+        sheet_name, row_data = build_transaction_row(transaction_data, key)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO journal (key, sheet_name, row, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, sheet_name, json.dumps(row_data), PENDING, time.time()),
+            )
+
+        logger.info(f"Queued transaction {key} for {sheet_name}")
+        if self.pending_count() >= self.batch_size:
+            self._wakeup.set()
+        return key
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM journal WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+
+    def flush(self) -> int:
+        """Write all pending rows to Sheets, returns the number written."""
+        # Baris dari append yang gagal dicek dulu, bisa saja sudah tertulis
+        self.recover()
+
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT key, sheet_name, row FROM journal WHERE status = ? ORDER BY id",
+                (PENDING,),
+            ).fetchall()
+            self._conn.execute(
+                "UPDATE journal SET status = ? WHERE status = ?", (INFLIGHT, PENDING)
+            )
+
+        if not rows:
+            return 0
+
+        by_sheet = defaultdict(list)
+        for key, sheet_name, row in rows:
+            by_sheet[sheet_name].append((key, json.loads(row)))
+
+        written = 0
+        for sheet_name, entries in by_sheet.items():
+            keys = [key for key, _ in entries]
+            try:
+                get_sheets_service().append_rows(
+                    sheet_name, [row for _, row in entries]
+                )
+            except Exception as e:
+                logger.error(
+                    f"Flush to {sheet_name} failed, {len(keys)} rows kept: {type(e).__name__}: {e}"
+                )
+                continue
+
+            self._delete(keys)
+            sheet_mirror.mark_stale(sheet_name)
+            written += len(keys)
+            logger.info(f"Flushed {len(keys)} transactions to {sheet_name}")
+
+        return written
+
+    def recover(self):
+        """
+        Resolve rows left in flight by a previous process or a failed flush.
+
+        Rows whose key is already in the sheet were written before the crash
+        or error and are dropped; the rest go back to pending. A missing
+        sheet has no rows yet, so all of its rows go back to pending.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, sheet_name FROM journal WHERE status = ?", (INFLIGHT,)
+            ).fetchall()
+
+        if not rows:
+            return
+
+        by_sheet = defaultdict(list)
+        for key, sheet_name in rows:
+            by_sheet[sheet_name].append(key)
+
+        for sheet_name, keys in by_sheet.items():
+            try:
+                existing = get_sheets_service().get_row_keys(sheet_name)
+            except Exception as e:
+                attempts = self._count_attempt(keys)
+                if attempts < self.verify_attempts:
+                    logger.warning(
+                        f"Could not verify {len(keys)} in-flight rows for "
+                        f"{sheet_name} (attempt {attempts}): {e}"
+                    )
+                    continue
+                logger.error(
+                    f"Could not verify {len(keys)} in-flight rows for {sheet_name} "
+                    f"after {attempts} attempts, requeued unverified, check the "
+                    f"sheet for duplicates: {e}"
+                )
+                existing = set()
+
+            written = [key for key in keys if key in existing]
+            self._delete(written)
+            if written:
+                sheet_mirror.mark_stale(sheet_name)
+            self._set_status([key for key in keys if key not in existing], PENDING)
+            logger.info(
+                f"Recovered {sheet_name}: {len(written)} already written, "
+                f"{len(keys) - len(written)} requeued"
+            )
+
+    def start(self):
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(
+            target=self._run, name="transaction-queue", daemon=True
+        )
+        self._worker.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wakeup.set()
+        if self._worker:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def _run(self):
+        try:
+            self.recover()
+        except Exception as e:
+            logger.error(f"Transaction queue recovery failed: {e}")
+
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Transaction queue flush failed: {e}")
+
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Final transaction queue flush failed: {e}")
+
+    def _set_status(self, keys, status):
+        if not keys:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE journal SET status = ?, attempts = 0 WHERE key = ?",
+                [(status, key) for key in keys],
+            )
+
+    def _count_attempt(self, keys) -> int:
+        """Count one failed verification of ``keys``, returns the highest count."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE journal SET attempts = attempts + 1 WHERE key = ?",
+                [(key,) for key in keys],
+            )
+            return max(
+                self._conn.execute(
+                    "SELECT attempts FROM journal WHERE key = ?", (key,)
+                ).fetchone()[0]
+                for key in keys
+            )
+
+    def _delete(self, keys):
+        if not keys:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM journal WHERE key = ?", [(key,) for key in keys]
+            )
+
+
+transaction_queue = TransactionQueue()
@@ -0,0 +1,184 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class UpdateDeduplicator:
+    """
+    Remembers recently accepted Telegram ``update_id`` values.
+
+    Telegram redelivers an update when the webhook answers slowly or with
+    an error, and a redelivered confirmation would queue the same
+    transaction twice. Ids are kept in insertion order for ``window``
+    seconds, at most ``max_entries`` of them. With a ``db_path`` they are
+    also written to SQLite and reloaded on start, so a retry that arrives
+    after a restart is still recognized.
+
+    ``accept`` and ``forget`` only touch memory, they run on the event loop
+    for every webhook request. A background thread writes the collected
+    changes in one transaction every ``flush_interval`` seconds.
+    """
+
+    def __init__(
+        self, db_path=None, window=None, max_entries=None, flush_interval=None
+    ):
+        self.db_path = settings.update_dedup_path if db_path is None else db_path
+        self.window = window or settings.update_dedup_window
+        self.max_entries = max_entries or settings.update_dedup_size
+        self.flush_interval = flush_interval or settings.update_dedup_flush_interval
+
+        self._lock = threading.Lock()
+        self._seen = OrderedDict()  # update_id -> waktu diterima
+        self._changes = {}  # update_id -> waktu diterima, None = dihapus
+        self._expire_before = None
+        self.accepted = 0
+        self.duplicates = 0
+
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+
+        self._conn = None
+        if self.db_path:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS updates (
+                        update_id INTEGER PRIMARY KEY,
+                        seen_at REAL NOT NULL
+                    )
+                    """
+                )
+            self._load()
+
+    def accept(self, update_id: int) -> bool:
+        """Record ``update_id``; False if it was already seen within the window."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if update_id in self._seen:
+                self.duplicates += 1
+                logger.info(f"Duplicate update {update_id} dropped")
+                return False
+            self._seen[update_id] = now
+            self.accepted += 1
+            if self._conn is not None:
+                self._changes[update_id] = now
+        return True
+
+    def forget(self, update_id: int):
+        """Drop ``update_id`` again, e.g. when it could not be queued."""
+        with self._lock:
+            if self._seen.pop(update_id, None) is None:
+                return
+            self.accepted -= 1
+            if self._conn is not None:
+                self._changes[update_id] = None
+
+    def flush(self):
+        """Write the changes collected since the last flush to SQLite."""
+        if self._conn is None:
+            return
+        with self._write_lock:
+            with self._lock:
+                changes, self._changes = self._changes, {}
+                expire_before, self._expire_before = self._expire_before, None
+            if not changes and expire_before is None:
+                return
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO updates (update_id, seen_at) VALUES (?, ?)",
+                    [
+                        (update_id, seen_at)
+                        for update_id, seen_at in changes.items()
+                        if seen_at is not None
+                    ],
+                )
+                self._conn.executemany(
+                    "DELETE FROM updates WHERE update_id = ?",
+                    [
+                        (update_id,)
+                        for update_id, seen_at in changes.items()
+                        if seen_at is None
+                    ],
+                )
+                if expire_before is not None:
+                    self._conn.execute(
+                        "DELETE FROM updates WHERE seen_at < ?", (expire_before,)
+                    )
+
+    def start(self):
+        if self._conn is None or (self._worker and self._worker.is_alive()):
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(
+            target=self._run, name="update-dedup", daemon=True
+        )
+        self._worker.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._worker:
+            self._worker.join(timeout)
+            self._worker = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Final update dedup flush failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.accepted + self.duplicates
+            return {
+                "tracked": len(self._seen),
+                "accepted": self.accepted,
+                "duplicates_dropped": self.duplicates,
+                "duplicate_rate": round(self.duplicates / total, 3) if total else 0.0,
+                "persistent": self._conn is not None,
+            }
+
+    def _expire(self, now: float):
+        cutoff = now - self.window
+        expired = 0
+        while self._seen:
+            update_id, seen_at = next(iter(self._seen.items()))
+            if seen_at >= cutoff and len(self._seen) < self.max_entries:
+                break
+            self._seen.popitem(last=False)
+            expired += 1
+        if expired and self._conn is not None:
+            self._expire_before = next(iter(self._seen.values()), now)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Update dedup flush failed: {e}")
+
+    def _load(self):
+        cutoff = time.time() - self.window
+        rows = self._conn.execute(
+            "SELECT update_id, seen_at FROM updates WHERE seen_at >= ? "
+            "ORDER BY seen_at DESC LIMIT ?",
+            (cutoff, self.max_entries),
+        ).fetchall()
+        for update_id, seen_at in reversed(rows):
+            self._seen[update_id] = seen_at
+        with self._conn:
+            self._conn.execute("DELETE FROM updates WHERE seen_at < ?", (cutoff,))
+        if rows:
+            logger.info(f"Loaded {len(rows)} recent update ids from {self.db_path}")
+
+
+update_dedup = UpdateDeduplicator()
@@ -0,0 +1,145 @@
+import asyncio
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def update_chat_id(update):
+    """Chat an update belongs to, None for updates without one."""
+    message = update.message or update.edited_message
+    if message is None and update.callback_query:
+        message = update.callback_query.message
+    return message.chat.id if message else None
+
+
+class Lane:
+    def __init__(self, size: int):
+        self.queue = asyncio.Queue()
+        # Semaphore asyncio adil (FIFO), jadi update yang menunggu tempat
+        # tetap masuk sesuai urutan datangnya
+        self.slots = asyncio.Semaphore(size)
+        self.waiting = 0
+        self.task = None
+
+
+class UpdateLanes:
+    """
+    Per-chat ordered executor for incoming Telegram updates.
+
+    Updates of one chat run one after another on that chat's lane, so two
+    quick taps never touch the same ``UserSession`` at once; different
+    chats run concurrently. A lane exists only while it has work. Each lane
+    holds at most ``lane_size`` updates and all lanes together at most
+    ``max_pending``. When a lane is full ``submit`` waits up to
+    ``enqueue_timeout`` seconds for room and then gives up, so the webhook
+    can answer with an error and Telegram delivers the update again later.
+    """
+
+    def __init__(self, handler, lane_size=None, max_pending=None, enqueue_timeout=None):
+        self.handler = handler
+        self.lane_size = lane_size or settings.update_lane_size
+        self.max_pending = max_pending or settings.update_max_pending
+        self.enqueue_timeout = (
+            enqueue_timeout
+            if enqueue_timeout is not None
+            else settings.update_enqueue_timeout
+        )
+        self._lanes = {}
+        self.pending = 0
+        self.processed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.max_lane_depth = 0
+
+    async def submit(self, update) -> bool:
+        """Queue ``update`` on its chat's lane; False when there is no room."""
+        if self.pending >= self.max_pending:
+            return self._reject(update, "all lanes are full")
+        # Tempat dipesan sebelum menunggu, jadi submit yang berjalan bersamaan
+        # tidak bisa melewati max_pending
+        self.pending += 1
+
+        key = update_chat_id(update)
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = Lane(self.lane_size)
+            lane.task = asyncio.create_task(self._drain(key, lane))
+
+        acquired = False
+        try:
+            if lane.slots.locked():
+                lane.waiting += 1
+                try:
+                    await asyncio.wait_for(lane.slots.acquire(), self.enqueue_timeout)
+                finally:
+                    lane.waiting -= 1
+            else:
+                await lane.slots.acquire()
+            acquired = True
+        except asyncio.TimeoutError:
+            return self._reject(update, f"lane {key} is full")
+        finally:
+            if not acquired:
+                self.pending -= 1
+                if not lane.waiting and lane.queue.empty():
+                    # Bangunkan _drain yang menunggu update dari submit ini
+                    lane.queue.put_nowait(None)
+        lane.queue.put_nowait(update)
+
+        self.max_lane_depth = max(self.max_lane_depth, lane.queue.qsize())
+        return True
+
+    async def stop(self, timeout=None):
+        """Let queued updates finish for up to ``timeout`` seconds, then cancel."""
+        tasks = [lane.task for lane in self._lanes.values()]
+        if not tasks:
+            return
+        timeout = timeout if timeout is not None else settings.update_shutdown_timeout
+        done, unfinished = await asyncio.wait(tasks, timeout=timeout)
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+        if unfinished:
+            logger.warning(f"Stopped {len(unfinished)} update lanes with work left")
+
+    def stats(self) -> dict:
+        return {
+            "lanes": len(self._lanes),
+            "pending": self.pending,
+            "deepest_lane": max(
+                (lane.queue.qsize() for lane in self._lanes.values()), default=0
+            ),
+            "max_lane_depth": self.max_lane_depth,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def _reject(self, update, reason: str) -> bool:
+        self.rejected += 1
+        logger.warning(f"Update {update.update_id} rejected: {reason}")
+        return False
+
+    async def _drain(self, key, lane: Lane):
+        while True:
+            if lane.queue.empty() and not lane.waiting:
+                # Lane kosong dilepas, dibuat lagi saat ada update baru
+                del self._lanes[key]
+                return
+
+            # Antrean bisa kosong selagi submit yang menunggu tempat belum
+            # sempat memasukkan update-nya, get() menunggu tanpa polling
+            update = await lane.queue.get()
+            if update is None:
+                # Submit tadi menyerah, periksa ulang apakah lane masih dipakai
+                continue
+            try:
+                await self.handler(update)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error handling update {update.update_id}: {e}")
+            finally:
+                self.pending -= 1
+                lane.slots.release()
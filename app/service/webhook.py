@@ -1,10 +1,11 @@
-from app.utils.logger import get_logger
+from app.utils.logger import get_logger, log_payload
 from app.utils.command import handle_command
-from app.utils.api import telegram_post, telegram_get
+from app.utils.api import telegram_post, telegram_get, telegram_download
 from app.core.config import settings
 from app.schema.webhook import Update
-import aiohttp
-from app.utils.logger import get_logger
+from app.service.receipt_cache import receipt_cache
+from app.service.telegram_dispatcher import telegram_dispatcher
+from app.service.update_lanes import UpdateLanes
 
 logger = get_logger(__name__)
 
@@ -40,48 +41,44 @@ class TelegramService:
     async def send_message(
         self, chat_id: int, text: str, parse_mode: str = "Markdown", reply_markup=None
     ) -> bool:
-        url = f"{self.base_url}/sendMessage"
         data = {"chat_id": chat_id, "text": text, "parse_mode": parse_mode}
 
         if reply_markup:
             data["reply_markup"] = reply_markup
 
         try:
-            result = await telegram_post(url, data)
-            if not result.get("ok", False):
-                # Kirim pesan error manual jika gagal
-                await telegram_post(
-                    url,
+            result = await telegram_dispatcher.call("sendMessage", data, chat_id)
+            if not result.get("ok", False) and result.get("error_code") != 429:
+                # Kirim pesan error manual jika gagal; saat kena rate limit
+                # pesan tambahan hanya akan ditolak lagi
+                await telegram_dispatcher.call(
+                    "sendMessage",
                     {
                         "chat_id": chat_id,
                         "text": "❌ Gagal mengirim hasil scan ke Telegram. Silakan coba lagi atau gunakan input manual.",
                         "parse_mode": "Markdown",
                     },
+                    chat_id,
                 )
             return result.get("ok", False)
         except Exception as e:
             logger.error(f"Error sending message: {e}")
-            await telegram_post(
-                url,
+            await telegram_dispatcher.call(
+                "sendMessage",
                 {
                     "chat_id": chat_id,
                     "text": "❌ Terjadi kesalahan saat mengirim pesan. Silakan coba lagi atau gunakan input manual.",
                     "parse_mode": "Markdown",
                 },
+                chat_id,
             )
             return False
 
     async def process_update(self, update: Update):
         try:
             logger.info(f"Processing update: {update.update_id}")
-
-            # Log seluruh struktur update untuk debugging
-            try:
-                import json
-
-                logger.info(f"Update structure: {json.dumps(update.dict())}")
-            except Exception as e:
-                logger.warning(f"Could not log update structure: {e}")
+            # Struktur update hanya di-serialize saat DEBUG atau terambil sampel
+            log_payload(logger, "Update structure", update)
 
             if update.message:
                 await self._handle_message(update.message)
@@ -98,74 +95,69 @@ class TelegramService:
         text = message.text or ""
         photo = None
 
-        # Log struktur message untuk debugging
-        try:
-            import json
-
-            logger.info(f"Message structure: {json.dumps(message.dict())}")
-        except Exception as e:
-            logger.warning(f"Could not log message structure: {e}")
-
         # Periksa apakah ada foto dengan metode yang lebih aman
         has_photo = False
         file_id = None
+        file_unique_id = None
 
         # Coba berbagai cara untuk mendapatkan foto
         if hasattr(message, "photo") and message.photo:
             has_photo = True
             file_id = message.photo[-1].file_id
+            file_unique_id = message.photo[-1].file_unique_id
         elif hasattr(message, "document") and message.document:
             if getattr(
                 message.document, "mime_type", None
             ) and message.document.mime_type.startswith("image/"):
                 has_photo = True
                 file_id = message.document.file_id
-
-        if has_photo and file_id:
+                file_unique_id = getattr(message.document, "file_unique_id", None)
+
+        fetch_photo = None
+        if has_photo and receipt_cache.has_file(file_unique_id):
+            # Nota ini sudah pernah diproses, hasilnya diambil dari cache.
+            # Foto tetap bisa diunduh bila entrinya terhapus sebelum dibaca.
+            logger.info(f"Photo {file_unique_id} from {user_name} already cached")
+            fetch_photo = lambda: self._download_photo(file_id)
+        elif has_photo and file_id:
             logger.info(
                 f"Photo received from {user_name} ({chat_id}), file_id: {file_id}"
             )
-
-            # Dapatkan file path
-            get_file_url = f"{self.base_url}/getFile"
-            file_info = await telegram_post(get_file_url, {"file_id": file_id})
-
-            if file_info.get("ok") and "result" in file_info:
-                file_path = file_info["result"].get("file_path")
-                if file_path:
-                    # Download file
-                    download_url = (
-                        f"https://api.telegram.org/file/bot{self.bot_token}/{file_path}"
-                    )
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(download_url) as response:
-                            if response.status == 200:
-                                photo = await response.read()
-                                logger.info(
-                                    f"Successfully downloaded photo ({len(photo)} bytes)"
-                                )
-                            else:
-                                logger.error(
-                                    f"Failed to download photo: {response.status}"
-                                )
-                else:
-                    logger.error("No file_path in getFile response")
-            else:
-                logger.error(f"Failed to get file info: {file_info}")
+            photo = await self._download_photo(file_id)
 
         logger.info(f"Message from {user_name} ({chat_id}): {text}")
 
         # Teruskan foto ke handle_command
         response_text, keyboard_markup = await handle_command(
-            text, user_name, chat_id, photo
+            text, user_name, chat_id, photo, file_unique_id, fetch_photo
         )
         await self.send_message(chat_id, response_text, reply_markup=keyboard_markup)
 
+    async def _download_photo(self, file_id: str):
+        # Dapatkan file path
+        get_file_url = f"{self.base_url}/getFile"
+        file_info = await telegram_post(get_file_url, {"file_id": file_id})
+
+        if not (file_info.get("ok") and "result" in file_info):
+            logger.error(f"Failed to get file info: {file_info}")
+            return None
+        file_path = file_info["result"].get("file_path")
+        if not file_path:
+            logger.error("No file_path in getFile response")
+            return None
+
+        # Download file
+        download_url = f"https://api.telegram.org/file/bot{self.bot_token}/{file_path}"
+        photo = await telegram_download(download_url)
+        if photo is not None:
+            logger.info(f"Successfully downloaded photo ({len(photo)} bytes)")
+        return photo
+
     async def _handle_edited_message(self, message):
-        logger.info(f"Edited message: {message}")
+        log_payload(logger, "Edited message", message)
 
     async def _handle_callback_query(self, callback_query):
-        logger.info(f"Callback query: {callback_query}")
+        log_payload(logger, "Callback query", callback_query)
 
         chat_id = callback_query.message.chat.id if callback_query.message else None
         user_name = callback_query.from_.first_name or "Unknown"
@@ -180,9 +172,8 @@ class TelegramService:
             callback_data, user_name, chat_id
         )
 
-        await telegram_post(
-            f"{self.base_url}/answerCallbackQuery",
-            {"callback_query_id": callback_query.id},
+        await telegram_dispatcher.call(
+            "answerCallbackQuery", {"callback_query_id": callback_query.id}
         )
 
         message_id = (
@@ -199,9 +190,11 @@ class TelegramService:
             if keyboard_markup:
                 edit_data["reply_markup"] = keyboard_markup
 
-            logger.info(f"Attempting to edit message with data: {edit_data}")
+            log_payload(logger, "Attempting to edit message with data", edit_data)
 
-            result = await telegram_post(f"{self.base_url}/editMessageText", edit_data)
+            result = await telegram_dispatcher.call(
+                "editMessageText", edit_data, chat_id
+            )
 
             if not result.get("ok"):
                 logger.error(f"Edit message failed: {result}")
@@ -212,3 +205,7 @@ class TelegramService:
             await self.send_message(
                 chat_id, response_text, reply_markup=keyboard_markup
             )
+
+
+telegram_service = TelegramService()
+update_lanes = UpdateLanes(telegram_service.process_update)
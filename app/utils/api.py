@@ -1,13 +1,68 @@
 import httpx
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TelegramHttpClient:
+    """
+    One pooled ``httpx.AsyncClient`` for all Telegram Bot API traffic.
+
+    Opened in the FastAPI lifespan and closed on shutdown, so every call
+    and file download reuses a kept-alive connection to api.telegram.org
+    instead of paying a TCP and TLS handshake each time. The client speaks
+    HTTP/2, so concurrent calls share that connection as multiplexed
+    streams.
+    """
+
+    def __init__(self):
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Di luar lifespan (script, benchmark) client dibuat saat pertama dipakai
+        if self._client is None or self._client.is_closed:
+            self.start()
+        return self._client
+
+    def start(self):
+        if self._client is not None and not self._client.is_closed:
+            return
+        self._client = httpx.AsyncClient(
+            http2=True,
+            timeout=settings.telegram_http_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.telegram_http_max_connections,
+                max_keepalive_connections=settings.telegram_http_max_connections,
+            ),
+        )
+        logger.info("Telegram HTTP client opened (http2)")
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Telegram HTTP client closed")
+
+
+telegram_http = TelegramHttpClient()
 
 
 async def telegram_post(url: str, data: dict):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=data)
-        return response.json()
+    response = await telegram_http.client.post(url, json=data)
+    return response.json()
 
 
 async def telegram_get(url: str):
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url)
-        return response.json()
+    response = await telegram_http.client.get(url)
+    return response.json()
+
+
+async def telegram_download(url: str):
+    """File content from ``url``, or None when Telegram answers with an error."""
+    response = await telegram_http.client.get(url)
+    if response.status_code != 200:
+        logger.error(f"Failed to download file: {response.status_code}")
+        return None
+    return response.content
@@ -1,15 +1,15 @@
 from app.utils.command.menu import handle_menu
 from app.utils.command.help import handle_help
+from app.utils.command.debug import handle_debug
 from app.utils.command.summary import handle_summary
 from app.utils.command.add.manual import handle_manual_add
 from app.utils.command.add.scan import handle_scan_add
 from app.utils.conversation import ConversationState, get_user_session
-from app.service.sheet import SheetsService
 
-sheets_service = SheetsService()
 
-
-async def handle_command(text, user_name, chat_id, photo=None):
+async def handle_command(
+    text, user_name, chat_id, photo=None, file_unique_id=None, fetch_photo=None
+):
     session = get_user_session(chat_id)
 
     if text.startswith("/start"):
@@ -26,6 +26,9 @@ async def handle_command(text, user_name, chat_id, photo=None):
     elif text.startswith("/help"):
         return handle_help()
 
+    elif text.startswith("/debug"):
+        return handle_debug(session)
+
     elif text.startswith("/summary"):
         return await handle_summary(text, chat_id)
 
@@ -63,7 +66,7 @@ async def handle_command(text, user_name, chat_id, photo=None):
         ConversationState.ADD_AI_CONFIRM,
         ConversationState.ADD_AI_EDIT,
     ]:
-        return await handle_scan_add(session, text, photo)
+        return await handle_scan_add(session, text, photo, file_unique_id, fetch_photo)
 
     return (
         "🤷‍♀️ Maaf, perintah yang kamu masukkan tidak aku kenali. Coba ketik /menu untuk melihat daftar perintah yang bisa kamu gunakan ya! 😉",
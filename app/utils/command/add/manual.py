@@ -1,5 +1,7 @@
 from datetime import datetime
 from app.utils.conversation import ConversationState
+from app.service.transaction_queue import transaction_queue
+from app.utils.receipt_categories import receipt_categories
 from app.utils.constant import (
     INCOME_CATEGORIES,
     EXPENSE_CATEGORIES,
@@ -234,10 +236,15 @@ def handle_manual_add(session, text, user_name):
         if text == "save_transaction":
             # Simpan ke sheets
             try:
-                from app.service.sheet import SheetsService
-
-                sheets_service = SheetsService()
-                sheets_service.add_transaction(session.transaction_data)
+                transaction_queue.enqueue(session.transaction_data)
+                kategori = session.transaction_data.get("kategori", "")
+                if (
+                    session.transaction_data.get("jenis") == "Pengeluaran"
+                    and kategori not in CATEGORY_MAP.values()
+                ):
+                    # Kategori ketikan sendiri ikut dikenali saat scan nota
+                    # berikutnya setelah cukup sering dipakai
+                    receipt_categories.confirm_category(kategori)
                 session.reset()
                 return (
                     "✅ Transaksi berhasil disimpan! Gunakan /add untuk menambahkan transaksi baru atau /menu untuk kembali ke menu utama.",
@@ -1,9 +1,10 @@
-from datetime import datetime
 from app.service.gemini import GeminiReceiptProcessor
 from app.utils.conversation import ConversationState
 from app.service.ocr import OCRService
+from app.service.transaction_queue import transaction_queue
 from app.utils.constant import get_back_keyboard, get_confirmation_keyboard
 from app.utils.logger import get_logger
+from app.utils.dates import format_sheet_date, has_time, parse_date
 import re
 
 logger = get_logger(__name__)
@@ -75,17 +76,21 @@ def _format_ocr_result(transaction_data: dict) -> str:
     return message
 
 
-async def handle_scan_add(session, text=None, photo=None):
+async def handle_scan_add(
+    session, text=None, photo=None, file_unique_id=None, fetch_photo=None
+):
     if session.state == ConversationState.ADD_AI_PROCESSING:
         if text and (text.lower() == "back" or text.lower() == "« kembali"):
             session.go_back()
             return "Silakan pilih metode input transaksi:", get_back_keyboard()
 
-        if photo:
+        if photo or file_unique_id:
             try:
                 session.set_state(ConversationState.ADD_AI_PROCESSING_WAIT)
 
-                transaction_data = await gemini_processor.process_receipt(photo)
+                transaction_data = await gemini_processor.process_receipt(
+                    photo, file_unique_id, fetch_photo
+                )
                 receipt_date = transaction_data.get("tanggal", "")
                 session.set_current_datetime()
                 transaction_data["tanggal"] = receipt_date
@@ -123,22 +128,22 @@ async def handle_scan_add(session, text=None, photo=None):
                         f"Failed to format amount: {session.transaction_data['jumlah']}"
                     )
 
-            # Format tanggal ke DD/MM/YYYY
+            # Format tanggal ke DD/MM/YYYY, jam dari nota tetap disimpan
             if "tanggal" in session.transaction_data:
                 try:
-                    raw_tanggal = str(session.transaction_data["tanggal"]).lstrip("'")
-                    date_obj = datetime.strptime(raw_tanggal, "%Y-%m-%d")
-                    session.transaction_data["tanggal"] = date_obj.strftime("%d/%m/%Y")
+                    tanggal = str(session.transaction_data["tanggal"])
+                    date_obj = parse_date(tanggal)
+                    if date_obj:
+                        session.transaction_data["tanggal"] = format_sheet_date(
+                            date_obj, has_time(tanggal)
+                        )
                 except Exception:
                     pass
 
             try:
-                from app.service.sheet import SheetsService
-
-                sheets_service = SheetsService()
-                sheets_service.add_transaction(session.transaction_data)
+                transaction_queue.enqueue(session.transaction_data)
 
-                logger.info(f"Transaction saved successfully to spreadsheet")
+                logger.info(f"Transaction queued for spreadsheet")
                 session.reset()
                 return "✅ Transaksi berhasil disimpan!", None
             except Exception as e:
@@ -0,0 +1,8 @@
+def handle_debug(session):
+    session.debug_trace = not session.debug_trace
+    if session.debug_trace:
+        return (
+            "🐞 Mode debug aktif. Log detail /summary untuk chat ini akan dicatat di server. Ketik /debug lagi untuk mematikan.",
+            None,
+        )
+    return "🐞 Mode debug dimatikan.", None
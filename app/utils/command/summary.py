@@ -113,7 +113,7 @@ async def handle_summary(text=None, chat_id=None) -> Tuple[str, Optional[Dict]]:
             )
 
             result = await ai_summary_generator.get_monthly_summary(
-                year, month, specific_query
+                year, month, specific_query, trace=session.debug_trace
             )
 
             if result["status"] == "success":
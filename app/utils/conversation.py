@@ -1,6 +1,7 @@
 from enum import Enum
 from datetime import datetime
 from typing import Dict, Optional
+from app.utils.dates import format_indonesian_datetime
 
 
 class ConversationState(Enum):
@@ -35,6 +36,8 @@ class UserSession:
         }
         self.prev_states = []
         self.temp_data = None
+        # Trace detail log /summary untuk chat ini, tidak ikut di-reset
+        self.debug_trace = False
 
     def set_state(self, new_state: ConversationState):
         self.prev_states.append(self.state)
@@ -61,23 +64,7 @@ class UserSession:
         }
 
     def set_current_datetime(self):
-        now = datetime.now()
-        month_names = [
-            "Januari",
-            "Februari",
-            "Maret",
-            "April",
-            "Mei",
-            "Juni",
-            "Juli",
-            "Agustus",
-            "September",
-            "Oktober",
-            "November",
-            "Desember",
-        ]
-        formatted_date = f"{now.day} {month_names[now.month-1]} {now.year} {now.hour:02d}:{now.minute:02d}"
-        self.transaction_data["tanggal"] = formatted_date
+        self.transaction_data["tanggal"] = format_indonesian_datetime(datetime.now())
 
 
 user_sessions: Dict[int, UserSession] = {}
@@ -0,0 +1,203 @@
+import re
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+MONTH_NAMES_ID = [
+    "Januari",
+    "Februari",
+    "Maret",
+    "April",
+    "Mei",
+    "Juni",
+    "Juli",
+    "Agustus",
+    "September",
+    "Oktober",
+    "November",
+    "Desember",
+]
+
+MONTH_NAMES_EN = [
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+]
+
+# Nama bulan lengkap dan singkatan (Indonesia & Inggris) ke angka bulan
+MONTH_NUMBERS = {}
+for _number, (_id, _en) in enumerate(zip(MONTH_NAMES_ID, MONTH_NAMES_EN), start=1):
+    for _name in (_id, _en):
+        MONTH_NUMBERS[_name.lower()] = _number
+        MONTH_NUMBERS[_name[:3].lower()] = _number
+MONTH_NUMBERS.update({"agu": 8, "agus": 8, "okt": 10, "des": 12, "sept": 9})
+
+# Jam opsional di belakang tanggal, "14:05", "14.05" atau "14:05:30"
+_TIME = r"(?:[ T](\d{1,2})[:.](\d{2})(?:[:.](\d{2}))?)?"
+
+
+def _numeric(day, month, year):
+    return int(day), int(month), int(year)
+
+
+def _named(day, month_name, year):
+    month = MONTH_NUMBERS.get(month_name.lower().rstrip("."))
+    if month is None:
+        return None
+    return int(day), month, int(year)
+
+
+# (name, compiled pattern, builder returning (day, month, year) from the
+# three date groups; the time groups follow them)
+DATE_FORMATS = [
+    (
+        "dd/mm/yyyy",
+        re.compile(rf"^(\d{{1,2}})/(\d{{1,2}})/(\d{{4}}){_TIME}$"),
+        lambda d, m, y: _numeric(d, m, y),
+    ),
+    (
+        "yyyy-mm-dd",
+        re.compile(rf"^(\d{{4}})-(\d{{1,2}})-(\d{{1,2}}){_TIME}$"),
+        lambda y, m, d: _numeric(d, m, y),
+    ),
+    (
+        "dd-mm-yyyy",
+        re.compile(rf"^(\d{{1,2}})-(\d{{1,2}})-(\d{{4}}){_TIME}$"),
+        lambda d, m, y: _numeric(d, m, y),
+    ),
+    (
+        "yyyy/mm/dd",
+        re.compile(rf"^(\d{{4}})/(\d{{1,2}})/(\d{{1,2}}){_TIME}$"),
+        lambda y, m, d: _numeric(d, m, y),
+    ),
+    (
+        # "31 Agustus 2025 14:05", "31 Aug 2025"
+        "dd month yyyy",
+        re.compile(rf"^(\d{{1,2}})\s+([A-Za-z]+\.?)\s+(\d{{4}}){_TIME}$"),
+        lambda d, m, y: _named(d, m, y),
+    ),
+    (
+        # "Agustus 31, 2025"
+        "month dd, yyyy",
+        re.compile(rf"^([A-Za-z]+\.?)\s+(\d{{1,2}}),?\s+(\d{{4}}){_TIME}$"),
+        lambda m, d, y: _named(d, m, y),
+    ),
+]
+
+_FORMAT_NAMES = [name for name, _, _ in DATE_FORMATS]
+_TIME_SUFFIX = re.compile(r"[ T]\d{1,2}[:.]\d{2}(?:[:.]\d{2})?$")
+
+
+def _clean(value: str) -> str:
+    # Tanggal dari sheet kadang diawali ' agar tidak diubah Google Sheets
+    return value.strip().lstrip("'").strip()
+
+
+def _match(value: str, fmt) -> Optional[datetime]:
+    _, pattern, build = fmt
+    match = pattern.match(value)
+    if not match:
+        return None
+    groups = match.groups()
+    parts = build(*groups[:3])
+    if parts is None:
+        return None
+    day, month, year = parts
+    hour, minute, second = (int(part or 0) for part in groups[3:])
+    try:
+        date_obj = datetime(year, month, day)
+    except ValueError:
+        return None
+    try:
+        return date_obj.replace(hour=hour, minute=minute, second=second)
+    except ValueError:
+        # Jam yang tidak valid diabaikan, tanggalnya tetap dipakai
+        return date_obj
+
+
+def detect_format(values: Iterable[str], sample_size: int = 200) -> Optional[str]:
+    """Name of the format matching most of the first ``sample_size`` values."""
+    counts = Counter()
+    for i, value in enumerate(values):
+        if i >= sample_size:
+            break
+        value = _clean(value)
+        for fmt in DATE_FORMATS:
+            if fmt[1].match(value):
+                counts[fmt[0]] += 1
+                break
+    if not counts:
+        return None
+    return counts.most_common(1)[0][0]
+
+
+@lru_cache(maxsize=8192)
+def _parse(value: str, hint: Optional[str]) -> Optional[datetime]:
+    if hint is not None:
+        preferred = DATE_FORMATS[_FORMAT_NAMES.index(hint)]
+        date_obj = _match(value, preferred)
+        if date_obj:
+            return date_obj
+
+    for fmt in DATE_FORMATS:
+        if fmt[0] == hint:
+            continue
+        date_obj = _match(value, fmt)
+        if date_obj:
+            return date_obj
+    return None
+
+
+def parse_date(value: str, hint: Optional[str] = None) -> Optional[datetime]:
+    """
+    Parse any date shape the bot writes or reads back from the sheet.
+
+    ``hint`` is a format name from ``detect_format``, tried before the
+    others. A time after the date is kept in the result. Results are
+    memoized in a bounded LRU because ledgers repeat the same date strings
+    many times.
+    """
+    if not value:
+        return None
+    return _parse(_clean(value), hint)
+
+
+def parse_date_column(values: List[str]) -> List[Optional[datetime]]:
+    """Parse a column of dates, trying its dominant format first."""
+    hint = detect_format(values)
+    return [parse_date(value, hint) for value in values]
+
+
+def has_time(value: str) -> bool:
+    """True when ``value`` ends in a time of day, e.g. "31 Agustus 2025 14:05"."""
+    return bool(value) and _TIME_SUFFIX.search(_clean(value)) is not None
+
+
+def format_sheet_date(date_obj: datetime, with_time: bool = False) -> str:
+    """
+    Format as "31/08/2025" or "31/08/2025 14:05", the shapes Google Sheets
+    reads as a date or a date with time.
+    """
+    if not with_time:
+        return date_obj.strftime("%d/%m/%Y")
+    if date_obj.second:
+        return date_obj.strftime("%d/%m/%Y %H:%M:%S")
+    return date_obj.strftime("%d/%m/%Y %H:%M")
+
+
+def format_indonesian_datetime(date_obj: datetime) -> str:
+    """Format as "31 Agustus 2025 14:05"."""
+    return (
+        f"{date_obj.day} {MONTH_NAMES_ID[date_obj.month - 1]} {date_obj.year} "
+        f"{date_obj.hour:02d}:{date_obj.minute:02d}"
+    )
@@ -0,0 +1,91 @@
+from collections import deque
+
+
+class KeywordMatcher:
+    """
+    Aho–Corasick automaton over lowercase keywords.
+
+    Every keyword carries a value and a weight; ``scores`` walks the text
+    once and sums the weights of all keyword occurrences per value,
+    overlapping ones included. Keywords match anywhere in the text, like the
+    ``keyword in text`` checks this replaces, unless added with
+    ``whole_word`` so they only count between non-alphanumeric characters.
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._own = [[]]
+        self._output = [[]]
+        self._delta = [{}]
+        self._built = True
+
+    def add(self, keyword: str, value, weight: float = 1.0, whole_word=False):
+        keyword = keyword.lower()
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+            state = next_state
+        # Panjang keyword hanya disimpan bila batas kata perlu dicek
+        self._own[state].append((value, weight, len(keyword) if whole_word else 0))
+        self._built = False
+
+    def build(self):
+        """
+        Compute failure links and fold them into a full transition table,
+        so ``scores`` does one dict lookup per character.
+        """
+        goto, fail = self._goto, self._fail
+        output = self._output = [list(own) for own in self._own]
+        queue = deque(goto[0].values())
+        for state in queue:
+            fail[state] = 0
+        order = []
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                fail[next_state] = goto[link].get(char, 0)
+                # Keyword yang merupakan akhiran keyword lain ikut dilaporkan
+                output[next_state] = output[next_state] + output[fail[next_state]]
+
+        # Urutan BFS menjamin transisi state gagal sudah lengkap lebih dulu
+        self._delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        for state in order:
+            self._delta[state] = {**self._delta[fail[state]], **goto[state]}
+        self._built = True
+
+    def scores(self, text: str) -> dict:
+        if not self._built:
+            self.build()
+
+        delta, output = self._delta, self._output
+        text = text.lower()
+        totals = {}
+        state = 0
+        for end, char in enumerate(text, start=1):
+            state = delta[state].get(char, 0)
+            if output[state]:
+                for value, weight, length in output[state]:
+                    if length and not _is_whole_word(text, end - length, end):
+                        continue
+                    totals[value] = totals.get(value, 0) + weight
+        return totals
+
+
+def _is_whole_word(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (
+        end == len(text) or not text[end].isalnum()
+    )
@@ -0,0 +1,172 @@
+import numpy as np
+from app.utils.dates import parse_date_column
+
+INCOME = 1
+EXPENSE = 0
+
+
+def _factorize(values):
+    """Integer code per value plus the list of distinct values."""
+    index = {}
+    codes = np.fromiter(
+        (index.setdefault(value, len(index)) for value in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+    return codes, list(index)
+
+
+def _sum_by(codes, amounts, size):
+    """
+    int64 sum of ``amounts`` per code. ``np.bincount`` weights would go
+    through float64 and round large rupiah totals.
+    """
+    totals = np.zeros(size, dtype=np.int64)
+    np.add.at(totals, codes, amounts)
+    return totals
+
+
+def parse_amount(amount_str: str) -> int:
+    amount_str = amount_str.replace(".", "").replace(",", "").strip()
+    return int(amount_str) if amount_str.isdigit() else 0
+
+
+class LedgerArrays:
+    """
+    Transaction rows of one sheet converted to typed numpy columns.
+
+    Dates and amounts repeat a lot in a ledger, so each distinct string is
+    parsed once and broadcast back to the rows through its code.
+    """
+
+    def __init__(
+        self, rows, date_idx, amount_idx, type_idx, category_idx, source_idx=None
+    ):
+        indices = [date_idx, amount_idx, type_idx, category_idx]
+        if source_idx is not None:
+            indices.append(source_idx)
+        min_len = max(indices) + 1
+        complete_rows = [row for row in rows if len(row) >= min_len]
+        self.skipped_rows = len(rows) - len(complete_rows)
+        rows = complete_rows
+        self.rows = rows
+
+        date_codes, date_values = _factorize([row[date_idx].strip() for row in rows])
+        parsed = parse_date_column(date_values)
+        self.unparsed_dates = [
+            value for value, date_obj in zip(date_values, parsed) if date_obj is None
+        ]
+        unique_ordinal = np.array(
+            [date_obj.toordinal() if date_obj else 0 for date_obj in parsed],
+            dtype=np.int32,
+        )
+        unique_year = np.array(
+            [date_obj.year if date_obj else 0 for date_obj in parsed], dtype=np.int16
+        )
+        unique_month = np.array(
+            [date_obj.month if date_obj else 0 for date_obj in parsed], dtype=np.int8
+        )
+        self.date_ordinal = unique_ordinal[date_codes]
+        self.year = unique_year[date_codes]
+        self.month = unique_month[date_codes]
+
+        amount_codes, amount_values = _factorize([row[amount_idx] for row in rows])
+        unique_amount = np.array(
+            [parse_amount(value) for value in amount_values], dtype=np.int64
+        )
+        self.amount = unique_amount[amount_codes]
+
+        type_codes, type_values = _factorize([row[type_idx].lower() for row in rows])
+        unique_type = np.array(
+            [INCOME if value == "pemasukan" else EXPENSE for value in type_values],
+            dtype=np.int8,
+        )
+        self.type_code = unique_type[type_codes]
+
+        self.category_code, self.categories = _factorize(
+            [row[category_idx] for row in rows]
+        )
+        self.source_code, self.sources = _factorize(
+            [row[source_idx] if source_idx is not None else "" for row in rows]
+        )
+
+    def month_mask(self, year: int, month: int):
+        return (self.year == year) & (self.month == month)
+
+    def month_rows(self, year: int, month: int):
+        return [self.rows[i] for i in np.flatnonzero(self.month_mask(year, month))]
+
+    def month_totals(self, year: int, month: int):
+        """
+        Totals for one month.
+
+        Returns (transaction_count, total_income, total_expense,
+        expense_by_category) where the dict only holds categories that have
+        expenses in that month.
+        """
+        mask = self.month_mask(year, month)
+        income_mask = mask & (self.type_code == INCOME)
+        expense_mask = mask & (self.type_code == EXPENSE)
+
+        total_income = int(self.amount[income_mask].sum())
+        total_expense = int(self.amount[expense_mask].sum())
+
+        by_category = _sum_by(
+            self.category_code[expense_mask],
+            self.amount[expense_mask],
+            len(self.categories),
+        )
+        present = np.bincount(
+            self.category_code[expense_mask], minlength=len(self.categories)
+        )
+        category_totals = {
+            self.categories[code]: int(by_category[code])
+            for code in np.flatnonzero(present)
+        }
+
+        return int(mask.sum()), total_income, total_expense, category_totals
+
+    def group_totals(self):
+        """
+        Totals per (year, month, jenis, kategori, sumber) over all dated rows.
+
+        Returns a list of (year, month, jenis, kategori, sumber, total, count)
+        with jenis normalized to "Pemasukan" or "Pengeluaran".
+        """
+        dated = self.year > 0
+        keys = np.stack(
+            [
+                self.year[dated].astype(np.int64),
+                self.month[dated].astype(np.int64),
+                self.type_code[dated].astype(np.int64),
+                self.category_code[dated].astype(np.int64),
+                self.source_code[dated].astype(np.int64),
+            ],
+            axis=1,
+        )
+        if not len(keys):
+            return []
+
+        groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        totals = _sum_by(inverse, self.amount[dated], len(groups))
+        counts = np.bincount(inverse)
+
+        return [
+            (
+                int(year),
+                int(month),
+                "Pemasukan" if type_code == INCOME else "Pengeluaran",
+                self.categories[category_code],
+                self.sources[source_code],
+                int(total),
+                int(count),
+            )
+            for (
+                year,
+                month,
+                type_code,
+                category_code,
+                source_code,
+            ), total, count in zip(groups, totals, counts)
+        ]
@@ -1,7 +1,52 @@
 import logging
+import random
+import orjson
+from pydantic import BaseModel
+from app.core.config import settings
+
+LOG_LEVEL = getattr(logging, settings.log_level.upper(), logging.INFO)
 
 
 def get_logger(name: str):
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    logger.setLevel(LOG_LEVEL)
     return logger
+
+
+def dumps(payload) -> str:
+    """Compact JSON for log lines; pydantic models use their own encoder."""
+    if isinstance(payload, BaseModel):
+        return payload.model_dump_json(by_alias=True, exclude_none=True)
+    return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+class LazyJSON:
+    """Renders ``payload`` as JSON only when a handler formats the record."""
+
+    __slots__ = ("payload",)
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __str__(self):
+        try:
+            return dumps(self.payload)
+        except Exception as e:
+            return f"<unserializable {type(self.payload).__name__}: {e}>"
+
+
+def log_payload(logger, label: str, payload, sample_rate=None):
+    """
+    Log a request/response payload without paying for it on every update.
+
+    Payloads are logged at DEBUG when the logger is enabled for it,
+    otherwise at INFO for a ``sample_rate`` fraction of calls
+    (``LOG_PAYLOAD_SAMPLE_RATE``, off by default). Serialization is
+    deferred to the handler, so a dropped record costs no encoding.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s: %s", label, LazyJSON(payload))
+        return
+    rate = settings.log_payload_sample_rate if sample_rate is None else sample_rate
+    if rate > 0 and random.random() < rate and logger.isEnabledFor(logging.INFO):
+        logger.info("%s: %s", label, LazyJSON(payload))
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+from collections import Counter
+from app.core.config import settings
+from app.utils.keyword_matcher import KeywordMatcher
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CATEGORY = "Lainnya"
+
+# Bobot per keyword; kata umum yang juga muncul di struk lain diberi bobot
+# lebih kecil. Urutan kategori dipakai sebagai pemecah skor seri.
+CATEGORY_KEYWORDS = {
+    "Makanan": {
+        "restaurant": 2,
+        "resto": 2,
+        "cafe": 2,
+        "food": 1,
+        "makanan": 1,
+        "minuman": 1,
+    },
+    "Transportasi": {
+        "transport": 1,
+        "transportasi": 1,
+        "grab": 2,
+        "gojek": 2,
+        "taxi": 2,
+        "taksi": 2,
+        "bus": 0.5,
+        "train": 1,
+        "kereta": 2,
+    },
+    "Invest": {
+        "invest": 1,
+        "investasi": 1,
+        "saham": 2,
+        "reksadana": 2,
+        "obligasi": 2,
+    },
+    "Belanja": {
+        "belanja": 1,
+        "supermarket": 2,
+        "mart": 1,
+        "market": 1,
+        "toko": 0.5,
+        "retail": 1,
+    },
+    "Tagihan": {
+        "pulsa": 2,
+        "data": 0.5,
+        "internet": 1,
+        "telepon": 1,
+        "phone": 0.5,
+    },
+}
+
+
+class ReceiptCategories:
+    """
+    Weighted receipt categorization over one keyword automaton.
+
+    Built-in keywords are merged with user-defined categories stored as
+    JSON at ``path`` (``{"Kopi": {"kopi": 1, "latte": 2}}``). User keywords
+    shorter than ``min_length`` are ignored and the rest only match whole
+    words, so a learned "tas" does not fire inside "kualitas".
+    Adding a category rebuilds the automaton and swaps it in, so readers
+    never see a half-built one.
+
+    Categories typed in by hand are learned through ``confirm_category``
+    only once ``min_confirmations`` saved transactions used them, so a
+    one-off typo never starts tagging receipts.
+    """
+
+    def __init__(self, path=None, min_length=None, min_confirmations=None):
+        self.path = path or settings.receipt_categories_path
+        self.min_length = min_length or settings.receipt_category_min_length
+        self.min_confirmations = (
+            min_confirmations or settings.receipt_category_min_confirmations
+        )
+        self._lock = threading.Lock()
+        self._confirmations = Counter()  # nama kategori -> jumlah konfirmasi
+        self.user_keywords = self._load()
+        self._matcher, self._order = self._build()
+
+    def scores(self, text: str) -> dict:
+        """Summed keyword weights per category found in ``text``."""
+        return self._matcher.scores(text)
+
+    def classify(self, text: str) -> str:
+        scores = self.scores(text)
+        if not scores:
+            return DEFAULT_CATEGORY
+        order = self._order
+        return max(scores, key=lambda category: (scores[category], -order[category]))
+
+    def confirm_category(self, name: str) -> bool:
+        """
+        Count one saved transaction in the hand-typed category ``name`` and
+        learn it once it reached ``min_confirmations``. True when learned.
+        """
+        name = name.strip()
+        if len(name) < self.min_length:
+            return False
+        key = name.lower()
+        with self._lock:
+            if any(key in keywords for keywords in self.user_keywords.values()):
+                return False
+            self._confirmations[key] += 1
+            if self._confirmations[key] < self.min_confirmations:
+                return False
+            del self._confirmations[key]
+        self.add_category(name)
+        return True
+
+    def add_category(self, name: str, keywords=None, weight: float = 1.0):
+        """Register or extend a user category, by default keyed on its name."""
+        name = name.strip()
+        keywords = keywords or [name]
+        with self._lock:
+            current = self.user_keywords.get(name, {})
+            new = {}
+            for keyword in keywords:
+                keyword = keyword.strip().lower()
+                if len(keyword) >= self.min_length and keyword not in current:
+                    new[keyword] = weight
+            if not new:
+                return
+            self.user_keywords.setdefault(name, {}).update(new)
+            self._save()
+            self._matcher, self._order = self._build()
+        logger.info(f"Receipt category {name} learned keywords {list(new)}")
+
+    def _build(self):
+        matcher = KeywordMatcher()
+        order = {}
+        for source in (CATEGORY_KEYWORDS, self.user_keywords):
+            user = source is self.user_keywords
+            for category, keywords in source.items():
+                order.setdefault(category, len(order))
+                for keyword, weight in keywords.items():
+                    if user and len(keyword) < self.min_length:
+                        continue
+                    matcher.add(keyword, category, weight, whole_word=user)
+        matcher.build()
+        return matcher, order
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read receipt categories {self.path}: {e}")
+            return {}
+        # Daftar keyword tanpa bobot juga diterima
+        return {
+            category: (
+                keywords
+                if isinstance(keywords, dict)
+                else {keyword: 1 for keyword in keywords}
+            )
+            for category, keywords in data.items()
+        }
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.user_keywords, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+receipt_categories = ReceiptCategories()
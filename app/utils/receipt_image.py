@@ -0,0 +1,136 @@
+import cv2
+import numpy as np
+
+# Lebar kertas struk thermal yang umum (80mm), dipakai untuk menghitung
+# resolusi kerja dari target DPI
+RECEIPT_WIDTH_MM = 80
+MAX_UPSCALE = 2.0
+# Foto tanpa tepi kertas dengan sisi di bawah ini diperbesar MAX_UPSCALE kali
+SMALL_PHOTO_PX = 1000
+
+# Deteksi kontur dilakukan pada salinan kecil agar murah
+_DETECT_HEIGHT = 500
+_MIN_AREA_RATIO = 0.2
+_MAX_SKEW_DEGREES = 15
+
+
+def target_width(dpi: int) -> int:
+    return round(dpi * RECEIPT_WIDTH_MM / 25.4)
+
+
+def _order_corners(points: np.ndarray) -> np.ndarray:
+    """Order 4 points as top-left, top-right, bottom-right, bottom-left."""
+    points = points.reshape(4, 2).astype(np.float32)
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array(
+        [
+            points[np.argmin(sums)],
+            points[np.argmin(diffs)],
+            points[np.argmax(sums)],
+            points[np.argmax(diffs)],
+        ],
+        dtype=np.float32,
+    )
+
+
+def find_receipt(gray: np.ndarray):
+    """
+    Corners of the receipt paper in ``gray``, or None.
+
+    The paper is assumed to be the largest bright quadrilateral covering at
+    least a fifth of the frame.
+    """
+    scale = min(1.0, _DETECT_HEIGHT / gray.shape[0])
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    small = cv2.GaussianBlur(small, (5, 5), 0)
+
+    edges = cv2.Canny(small, 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = _MIN_AREA_RATIO * small.shape[0] * small.shape[1]
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        if cv2.contourArea(contour) < min_area:
+            break
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4:
+            return _order_corners(approx) / scale
+    return None
+
+
+def warp_receipt(gray: np.ndarray, corners: np.ndarray) -> np.ndarray:
+    """Perspective-correct the quadrilateral ``corners`` into a flat rectangle."""
+    tl, tr, br, bl = corners
+    width = int(max(np.linalg.norm(br - bl), np.linalg.norm(tr - tl)))
+    height = int(max(np.linalg.norm(tr - br), np.linalg.norm(tl - bl)))
+    destination = np.array(
+        [[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]],
+        dtype=np.float32,
+    )
+    matrix = cv2.getPerspectiveTransform(corners, destination)
+    return cv2.warpPerspective(gray, matrix, (width, height))
+
+
+def skew_angle(gray: np.ndarray) -> float:
+    """Rotation in degrees that straightens the text lines of ``gray``."""
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    coords = cv2.findNonZero(ink)
+    if coords is None:
+        return 0.0
+    angle = cv2.minAreaRect(coords)[-1]
+    # minAreaRect memberi sudut (0, 90] pada OpenCV baru, [-90, 0) pada lama
+    if angle > 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    return angle if abs(angle) <= _MAX_SKEW_DEGREES else 0.0
+
+
+def deskew(gray: np.ndarray) -> np.ndarray:
+    angle = skew_angle(gray)
+    if abs(angle) < 0.5:
+        return gray
+    height, width = gray.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(
+        gray,
+        matrix,
+        (width, height),
+        flags=cv2.INTER_LINEAR,
+        borderMode=cv2.BORDER_REPLICATE,
+    )
+
+
+def fit_width(gray: np.ndarray, width: int) -> np.ndarray:
+    """Resize to ``width`` pixels wide, upscaling at most ``MAX_UPSCALE``x."""
+    scale = min(width / gray.shape[1], MAX_UPSCALE)
+    if abs(scale - 1.0) < 0.05:
+        return gray
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=interpolation)
+
+
+def upscale_small(gray: np.ndarray) -> np.ndarray:
+    """Enlarge ``MAX_UPSCALE``x when a side is under ``SMALL_PHOTO_PX`` pixels."""
+    if min(gray.shape[:2]) >= SMALL_PHOTO_PX:
+        return gray
+    return cv2.resize(
+        gray, None, fx=MAX_UPSCALE, fy=MAX_UPSCALE, interpolation=cv2.INTER_CUBIC
+    )
+
+
+def prepare_receipt(gray: np.ndarray, dpi: int) -> np.ndarray:
+    """
+    Crop a grayscale photo to the receipt paper, straighten it and bring it
+    to the working resolution of ``dpi``. Photos without a detectable paper
+    edge are only deskewed: the receipt then covers an unknown part of the
+    frame, so scaling the whole frame to the paper width could shrink the
+    text. Small ones are still enlarged like before cropping existed, so
+    far-away Telegram photos keep enough pixels per glyph.
+    """
+    corners = find_receipt(gray)
+    if corners is None:
+        return upscale_small(deskew(gray))
+    gray = deskew(warp_receipt(gray, corners))
+    return fit_width(gray, target_width(dpi))
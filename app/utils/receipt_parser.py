@@ -1,326 +1,295 @@
 import re
 from datetime import datetime
+from functools import lru_cache
 from app.utils.logger import get_logger
+from app.utils.dates import MONTH_NUMBERS, format_indonesian_datetime, parse_date
+from app.utils.receipt_categories import receipt_categories
 
 logger = get_logger(__name__)
 
+_AMOUNT = r"\s*:?\s*(?:Rp\.?|IDR)?\s*([\d.,]+)"
+
+# Baris total yang eksplisit, SUBTOTAL tidak dihitung
+TOTAL_ANCHOR_PATTERN = re.compile(
+    r"(?<![A-Za-z])(?:GRAND\s*TOTAL|TOTAL)" + _AMOUNT, re.IGNORECASE
+)
+# Label total tanpa angka, angkanya ada di baris berikutnya
+TOTAL_LABEL_PATTERN = re.compile(
+    r"^(?:GRAND\s*)?TOTAL\s*:?\s*(?:Rp\.?|IDR)?$", re.IGNORECASE
+)
+SUBTOTAL_PATTERN = re.compile(r"SUB\s*TOTAL" + _AMOUNT, re.IGNORECASE)
+AMOUNT_LABEL_PATTERN = re.compile(r"\b(?:Jumlah|Amount)" + _AMOUNT, re.IGNORECASE)
+TAX_PATTERN = re.compile(r"\b(?:PPN|Tax|Pajak|VAT)\b" + _AMOUNT + "(%?)", re.IGNORECASE)
+DISCOUNT_PATTERN = re.compile(
+    r"\b(?:Diskon|Discount|Potongan)\b" + _AMOUNT + "(%?)", re.IGNORECASE
+)
+DATE_NUMERIC_PATTERN = re.compile(r"(\d{1,2})[/-](\d{1,2})[/-](20\d{2})")
+DATE_NAMED_PATTERN = re.compile(r"(\d{1,2})\s+([A-Za-z]+)\s+(20\d{2})")
+STORE_LABEL_PATTERN = re.compile(r"(?:Store|Merchant|Toko)\s*:\s*(.*)")
+ITEM_PATTERN = re.compile(r"(.*?)(?:Rp\.?|IDR)?\s*([\d.,]+)(?:\s*(?:x|×)\s*(\d+))?\s*$")
+# Saringan murah: pola label hanya dicoba pada baris yang memuat salah satunya
+LABEL_KEYWORD_PATTERN = re.compile(
+    r"total|ppn|tax|pajak|vat|diskon|discount|potongan|jumlah|amount", re.IGNORECASE
+)
+NUMBER_PATTERN = re.compile(r"[\d.,]+")
+BARE_AMOUNT_PATTERN = re.compile(r"(?:Rp\.?|IDR)?\s*([\d.,]+)")
+
+RECEIPT_TITLE_KEYWORDS = ("receipt", "invoice", "struk", "nota")
+NON_ITEM_PATTERN = re.compile(
+    r"total|tax|pajak|ppn|vat|diskon|discount|tunai|kembali|cash|change|bayar",
+    re.IGNORECASE,
+)
+
+# Bobot tiap pemeriksaan pada skor kepercayaan hasil parse lokal
+SCORE_WEIGHTS = {
+    "total_anchor": 0.4,
+    "items_match_total": 0.3,
+    "valid_date": 0.2,
+    "store_name": 0.1,
+}
+
+
+def _digits(value: str) -> str:
+    return value.replace(".", "").replace(",", "")
+
+
+def _month_number(name: str):
+    name = name.lower()
+    return MONTH_NUMBERS.get(name) or MONTH_NUMBERS.get(name[:3])
+
+
+def _adjustment(match) -> dict:
+    value, percent = match.group(1), match.group(2)
+    if percent or not ("." in value or "," in value):
+        return {"type": "percentage", "value": value}
+    return {"type": "amount", "value": _digits(value)}
+
+
+class ReceiptLines:
+    """
+    Everything ``ReceiptParser`` needs from a receipt, collected in one scan.
+
+    Each line is classified once as date, total, subtotal, tax, discount,
+    item or header with the precompiled patterns above.
+    """
+
+    def __init__(self, text: str):
+        self.numeric_date = None
+        self.named_date = None
+        self.store_name = None
+        self.totals = []
+        self.subtotal = None
+        self.labelled_amount = None
+        self.tax = None
+        self.discount = None
+        self.items = []
+        self.item_hint = None
+
+        label = STORE_LABEL_PATTERN.search(text)
+        self.store_label = label.group(1).strip() if label else None
+        amounts = [
+            int(number)
+            for number in _digits(" ".join(NUMBER_PATTERN.findall(text))).split()
+            if number.isdigit()
+        ]
+        self.max_amount = max(amounts) if amounts else None
+
+        pending = None
+        for index, line in enumerate(text.split("\n")):
+            stripped = line.strip()
+            lowered = line.lower()
+
+            if pending == "total":
+                bare = BARE_AMOUNT_PATTERN.fullmatch(stripped)
+                if bare:
+                    self.totals.append(_digits(bare.group(1)))
+            elif pending == "item_hint" and stripped:
+                self.item_hint = stripped
+            pending = None
+
+            if index < 3 and line and self.store_name is None:
+                if not any(k in lowered for k in RECEIPT_TITLE_KEYWORDS):
+                    self.store_name = stripped
+            if self._classify(line, stripped) == "total_label":
+                pending = "total"
+            elif self.item_hint is None and ("item" in lowered or "barang" in lowered):
+                pending = "item_hint"
+
+    def _classify(self, line: str, stripped: str) -> str:
+        if "20" in line:
+            date = DATE_NUMERIC_PATTERN.search(line)
+            if date:
+                if self.numeric_date is None:
+                    self.numeric_date = date.groups()
+                return "date"
+            date = DATE_NAMED_PATTERN.search(line)
+            if date and _month_number(date.group(2)):
+                if self.named_date is None:
+                    self.named_date = date.groups()
+                return "date"
+
+        if LABEL_KEYWORD_PATTERN.search(line):
+            kind = self._classify_label(line, stripped)
+            if kind:
+                return kind
+
+        # Baris item selalu diakhiri angka (harga atau jumlah barang)
+        item = ITEM_PATTERN.match(line) if stripped[-1:].isdigit() else None
+        if item:
+            name = item.group(1).strip()
+            if name and not NON_ITEM_PATTERN.search(name):
+                self.items.append(
+                    {
+                        "name": name,
+                        "price": _digits(item.group(2)),
+                        "quantity": item.group(3) or "1",
+                    }
+                )
+                return "item"
+        return "header"
+
+    def _classify_label(self, line: str, stripped: str):
+        total = TOTAL_ANCHOR_PATTERN.search(line)
+        if total:
+            self.totals.append(_digits(total.group(1)))
+            return "total"
+        if TOTAL_LABEL_PATTERN.match(stripped):
+            return "total_label"
+
+        subtotal = SUBTOTAL_PATTERN.search(line)
+        if subtotal:
+            if self.subtotal is None:
+                self.subtotal = _digits(subtotal.group(1))
+            return "subtotal"
+
+        tax = TAX_PATTERN.search(line)
+        if tax:
+            if self.tax is None:
+                self.tax = _adjustment(tax)
+            return "tax"
+
+        discount = DISCOUNT_PATTERN.search(line)
+        if discount:
+            if self.discount is None:
+                self.discount = _adjustment(discount)
+            return "discount"
+
+        labelled = AMOUNT_LABEL_PATTERN.search(line)
+        if labelled and self.labelled_amount is None:
+            self.labelled_amount = _digits(labelled.group(1))
+        return None
+
+    @property
+    def date(self) -> str:
+        if self.numeric_date:
+            return "/".join(self.numeric_date)
+        if self.named_date:
+            day, month_name, year = self.named_date
+            return f"{day}/{_month_number(month_name)}/{year}"
+        return ""
+
+    @property
+    def total(self) -> str:
+        for amount in (
+            self.totals[0] if self.totals else None,
+            self.subtotal,
+            self.labelled_amount,
+        ):
+            if amount:
+                return amount
+        return str(self.max_amount) if self.max_amount is not None else "0"
+
+    @property
+    def description(self) -> str:
+        if self.items:
+            names = [item["name"] for item in self.items]
+            return ", ".join(names[:3]) + ("..." if len(names) > 3 else "")
+        return self.item_hint or "Pembelian barang"
+
+
+@lru_cache(maxsize=32)
+def scan_receipt(text: str) -> ReceiptLines:
+    """Single pass over ``text``, shared by parsing and scoring of one receipt."""
+    return ReceiptLines(text)
+
 
 class ReceiptParser:
     def __init__(self):
         logger.info("ReceiptParser initialized")
 
     def parse_receipt_text(self, text: str) -> dict:
+        lines = scan_receipt(text)
         transaction_data = {
-            "tanggal": self._extract_date(text),
-            "nama": self._extract_store_name(text),
+            "tanggal": lines.date,
+            "nama": lines.store_name or lines.store_label or "Toko/Merchant",
             "jenis": "Pengeluaran",  # Default untuk nota adalah pengeluaran
             "sumber": "Cash",  # Default sumber dana
             "kategori": self._extract_category(text),
-            "jumlah": self._extract_total_amount(text),
-            "deskripsi": self._extract_items_description(text),
-            "items": self._extract_items(text),
-            "tax": self._extract_tax(text),
-            "discount": self._extract_discount(text),
+            "jumlah": lines.total,
+            "deskripsi": lines.description,
+            "items": [dict(item) for item in lines.items],
+            "tax": dict(lines.tax or {"type": "none", "value": "0"}),
+            "discount": dict(lines.discount or {"type": "none", "value": "0"}),
             "raw_text": text,  # Simpan teks asli untuk referensi
         }
 
-        if transaction_data["tanggal"]:
-            try:
-                date_obj = datetime.strptime(transaction_data["tanggal"], "%d/%m/%Y")
-                month_names = [
-                    "Januari",
-                    "Februari",
-                    "Maret",
-                    "April",
-                    "Mei",
-                    "Juni",
-                    "Juli",
-                    "Agustus",
-                    "September",
-                    "Oktober",
-                    "November",
-                    "Desember",
-                ]
-                transaction_data["tanggal"] = (
-                    f"{date_obj.day} {month_names[date_obj.month-1]} {date_obj.year} {datetime.now().hour:02d}:{datetime.now().minute:02d}"
-                )
-            except:
-                now = datetime.now()
-                month_names = [
-                    "Januari",
-                    "Februari",
-                    "Maret",
-                    "April",
-                    "Mei",
-                    "Juni",
-                    "Juli",
-                    "Agustus",
-                    "September",
-                    "Oktober",
-                    "November",
-                    "Desember",
-                ]
-                transaction_data["tanggal"] = (
-                    f"{now.day} {month_names[now.month-1]} {now.year} {now.hour:02d}:{now.minute:02d}"
-                )
+        now = datetime.now()
+        date_obj = parse_date(transaction_data["tanggal"])
+        if date_obj:
+            date_obj = date_obj.replace(hour=now.hour, minute=now.minute)
         else:
-            now = datetime.now()
-            month_names = [
-                "Januari",
-                "Februari",
-                "Maret",
-                "April",
-                "Mei",
-                "Juni",
-                "Juli",
-                "Agustus",
-                "September",
-                "Oktober",
-                "November",
-                "Desember",
-            ]
-            transaction_data["tanggal"] = (
-                f"{now.day} {month_names[now.month-1]} {now.year} {now.hour:02d}:{now.minute:02d}"
-            )
+            date_obj = now
+        transaction_data["tanggal"] = format_indonesian_datetime(date_obj)
 
         return transaction_data
 
-    def _extract_date(self, text: str) -> str:
-        date_patterns = [
-            r"(\d{1,2})[/-](\d{1,2})[/-](20\d{2})",
-            r"(\d{1,2})\s+([A-Za-z]+)\s+(20\d{2})",
-            r"Date\s*:\s*(\d{1,2})[/-](\d{1,2})[/-](20\d{2})",
-            r"Tanggal\s*:\s*(\d{1,2})[/-](\d{1,2})[/-](20\d{2})",
-        ]
-
-        for pattern in date_patterns:
-            match = re.search(pattern, text)
-            if match:
-                if len(match.groups()) == 3:
-                    day, month, year = match.groups()
-                    if re.match(r"[A-Za-z]+", month):
-                        month_names = {
-                            "jan": 1,
-                            "feb": 2,
-                            "mar": 3,
-                            "apr": 4,
-                            "may": 5,
-                            "jun": 6,
-                            "jul": 7,
-                            "aug": 8,
-                            "sep": 9,
-                            "oct": 10,
-                            "nov": 11,
-                            "dec": 12,
-                            "januari": 1,
-                            "februari": 2,
-                            "maret": 3,
-                            "april": 4,
-                            "mei": 5,
-                            "juni": 6,
-                            "juli": 7,
-                            "agustus": 8,
-                            "september": 9,
-                            "oktober": 10,
-                            "november": 11,
-                            "desember": 12,
-                        }
-                        month_lower = month.lower()
-                        for key, value in month_names.items():
-                            if month_lower.startswith(key):
-                                month = str(value)
-                                break
-                    return f"{day}/{month}/{year}"
-
-        return ""
-
-    def _extract_store_name(self, text: str) -> str:
-        lines = text.split("\n")
-        for i in range(min(3, len(lines))):
-            if lines[i] and not any(
-                keyword in lines[i].lower()
-                for keyword in ["receipt", "invoice", "struk", "nota"]
-            ):
-                return lines[i].strip()
-
-        store_patterns = [
-            r"Store\s*:\s*(.*)",
-            r"Merchant\s*:\s*(.*)",
-            r"Toko\s*:\s*(.*)",
-        ]
-
-        for pattern in store_patterns:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(1).strip()
-
-        return "Toko/Merchant"
+    def score(self, transaction_data: dict):
+        """
+        Confidence in a ``parse_receipt_text`` result, from 0 to 1.
+
+        Returns (score, checks) where ``checks`` tells which of the
+        ``SCORE_WEIGHTS`` checks passed.
+        """
+        lines = scan_receipt(transaction_data.get("raw_text", ""))
+        total = self._to_int(transaction_data.get("jumlah"))
+
+        anchors = [self._to_int(amount) for amount in lines.totals]
+        date_obj = parse_date(lines.date)
+
+        checks = {
+            "total_anchor": total > 0 and total in anchors,
+            "items_match_total": total > 0
+            and self._items_match_total(transaction_data, total),
+            "valid_date": date_obj is not None
+            and datetime(2000, 1, 1) <= date_obj <= datetime.now(),
+            "store_name": transaction_data.get("nama", "Toko/Merchant")
+            != "Toko/Merchant",
+        }
+        score = sum(SCORE_WEIGHTS[name] for name, passed in checks.items() if passed)
+        return round(score, 2), checks
+
+    def _items_match_total(self, transaction_data: dict, total: int) -> bool:
+        items_total = 0
+        for item in transaction_data.get("items", []):
+            price = self._to_int(item.get("price"))
+            # Angka kecil biasanya nomor alamat/jam, bukan harga rupiah
+            if price < 100 or not re.search(r"[A-Za-z]", item.get("name", "")):
+                continue
+            items_total += price * max(self._to_int(item.get("quantity")), 1)
+        if not items_total:
+            return False
+
+        adjustments = 0
+        for key, sign in (("tax", 1), ("discount", -1)):
+            info = transaction_data.get(key, {})
+            if info.get("type") == "amount":
+                adjustments += sign * self._to_int(info.get("value"))
+        return total in (items_total, items_total + adjustments)
+
+    @staticmethod
+    def _to_int(value) -> int:
+        digits = re.sub(r"[^\d]", "", str(value or ""))
+        return int(digits) if digits else 0
 
     def _extract_category(self, text: str) -> str:
-        text_lower = text.lower()
-
-        if any(
-            keyword in text_lower
-            for keyword in ["restaurant", "resto", "cafe", "food", "makanan", "minuman"]
-        ):
-            return "Makanan"
-        elif any(
-            keyword in text_lower
-            for keyword in [
-                "transport",
-                "transportasi",
-                "grab",
-                "gojek",
-                "taxi",
-                "taksi",
-                "bus",
-                "train",
-                "kereta",
-            ]
-        ):
-            return "Transportasi"
-        elif any(
-            keyword in text_lower
-            for keyword in ["invest", "investasi", "saham", "reksadana", "obligasi"]
-        ):
-            return "Investasi"
-        elif any(
-            keyword in text_lower
-            for keyword in [
-                "belanja",
-                "supermarket",
-                "mart",
-                "market",
-                "toko",
-                "retail",
-            ]
-        ):
-            return "Belanja"
-        elif any(
-            keyword in text_lower
-            for keyword in ["pulsa", "data", "internet", "telepon", "phone"]
-        ):
-            return "Telekomunikasi"
-
-        # Default
-        return "Lainnya"
-
-    def _extract_total_amount(self, text: str) -> str:
-        total_patterns = [
-            r"Total\s*:?\s*(?:Rp\.?|IDR)?\s*([\d.,]+)",
-            r"TOTAL\s*:?\s*(?:Rp\.?|IDR)?\s*([\d.,]+)",
-            r"Grand Total\s*:?\s*(?:Rp\.?|IDR)?\s*([\d.,]+)",
-            r"Jumlah\s*:?\s*(?:Rp\.?|IDR)?\s*([\d.,]+)",
-            r"Amount\s*:?\s*(?:Rp\.?|IDR)?\s*([\d.,]+)",
-        ]
-
-        for pattern in total_patterns:
-            match = re.search(pattern, text)
-            if match:
-                # Bersihkan format angka
-                amount = match.group(1).replace(".", "").replace(",", "")
-                return amount
-
-        amounts = re.findall(r"(?:Rp\.?|IDR)?\s*([\d.,]+)", text)
-        if amounts:
-            cleaned_amounts = []
-            for amount in amounts:
-                try:
-                    cleaned = amount.replace(".", "").replace(",", "")
-                    if cleaned.isdigit():
-                        cleaned_amounts.append(int(cleaned))
-                except ValueError:
-                    continue
-
-            if cleaned_amounts:
-                return str(max(cleaned_amounts))
-
-        return "0"
-
-    def _extract_items_description(self, text: str) -> str:
-        items = self._extract_items(text)
-        if items:
-            item_names = [item.get("name", "") for item in items]
-            return ", ".join(item_names[:3]) + ("..." if len(item_names) > 3 else "")
-
-        lines = text.split("\n")
-        for i in range(len(lines)):
-            if "item" in lines[i].lower() or "barang" in lines[i].lower():
-                if i + 1 < len(lines) and lines[i + 1].strip():
-                    return lines[i + 1].strip()
-
-        return "Pembelian barang"
-
-    def _extract_items(self, text: str) -> list:
-        items = []
-        lines = text.split("\n")
-
-        for i in range(len(lines)):
-            price_match = re.search(
-                r"(.*?)(?:Rp\.?|IDR)?\s*([\d.,]+)(?:\s*(?:x|×)\s*(\d+))?\s*$", lines[i]
-            )
-            if price_match:
-                name = price_match.group(1).strip()
-                price = price_match.group(2).replace(".", "").replace(",", "")
-                quantity = price_match.group(3) if price_match.group(3) else "1"
-
-                if name and not any(
-                    keyword in name.lower()
-                    for keyword in [
-                        "total",
-                        "subtotal",
-                        "tax",
-                        "pajak",
-                        "diskon",
-                        "discount",
-                    ]
-                ):
-                    items.append({"name": name, "price": price, "quantity": quantity})
-
-        return items
-
-    def _extract_tax(self, text: str) -> dict:
-        tax_patterns = [
-            r"PPN\s*:?\s*(?:Rp\.?|IDR)?\s*([\d.,]+)",
-            r"Tax\s*:?\s*(?:Rp\.?|IDR)?\s*([\d.,]+)",
-            r"Pajak\s*:?\s*(?:Rp\.?|IDR)?\s*([\d.,]+)",
-            r"VAT\s*:?\s*(?:Rp\.?|IDR)?\s*([\d.,]+)",
-            r"PPN\s*(\d+)%",
-            r"Tax\s*(\d+)%",
-            r"Pajak\s*(\d+)%",
-            r"VAT\s*(\d+)%",
-        ]
-
-        for pattern in tax_patterns:
-            match = re.search(pattern, text)
-            if match:
-                value = match.group(1)
-                if "." in value or "," in value:  # Nilai absolut
-                    tax_amount = value.replace(".", "").replace(",", "")
-                    return {"type": "amount", "value": tax_amount}
-                else:  # Persentase
-                    return {"type": "percentage", "value": value}
-
-        return {"type": "none", "value": "0"}
-
-    def _extract_discount(self, text: str) -> dict:
-        discount_patterns = [
-            r"Diskon\s*:?\s*(?:Rp\.?|IDR)?\s*([\d.,]+)",
-            r"Discount\s*:?\s*(?:Rp\.?|IDR)?\s*([\d.,]+)",
-            r"Potongan\s*:?\s*(?:Rp\.?|IDR)?\s*([\d.,]+)",
-            r"Diskon\s*(\d+)%",
-            r"Discount\s*(\d+)%",
-            r"Potongan\s*(\d+)%",
-        ]
-
-        for pattern in discount_patterns:
-            match = re.search(pattern, text)
-            if match:
-                value = match.group(1)
-                if "." in value or "," in value:  # Nilai absolut
-                    discount_amount = value.replace(".", "").replace(",", "")
-                    return {"type": "amount", "value": discount_amount}
-                else:  # Persentase
-                    return {"type": "percentage", "value": value}
-
-        return {"type": "none", "value": "0"}
+        return receipt_categories.classify(text)
@@ -0,0 +1,39 @@
+import time
+from app.core.config import settings
+
+
+class RequestTrace:
+    """
+    Step timings and optional detail logging for a single request.
+
+    Detail lines are only formatted when the trace is enabled, either
+    globally with ``SUMMARY_TRACE=true`` or per chat through ``/debug``.
+    The timings are always collected so the default path can report them
+    in one line.
+    """
+
+    def __init__(self, logger, name: str, enabled: bool = False):
+        self.logger = logger
+        self.name = name
+        self.enabled = enabled or settings.summary_trace
+        self.timings = {}
+        self._start = time.perf_counter()
+        self._last = self._start
+
+    def log(self, message: str, *args):
+        """Log a detail line, ``args`` are only interpolated when enabled."""
+        if self.enabled:
+            self.logger.info(f"[trace {self.name}] {message}", *args)
+
+    def mark(self, step: str):
+        """Record the time spent since the previous mark under ``step``."""
+        now = time.perf_counter()
+        self.timings[step] = (now - self._last) * 1000
+        self._last = now
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def format_timings(self) -> str:
+        steps = " ".join(f"{step}={ms:.1f}ms" for step, ms in self.timings.items())
+        return f"{steps} total={self.elapsed_ms():.1f}ms"
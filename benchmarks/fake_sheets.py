@@ -0,0 +1,127 @@
+"""In-process stand-in for the parts of gspread used by SheetsService.
+
+Every call that would hit the Google API sleeps for a configurable latency
+and is counted, so benchmarks can compare round-trips as well as wall time.
+"""
+
+import os
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from unittest import mock
+
+import gspread
+
+from app.service.aggregates import AggregateStore
+
+
+class FakeBackend:
+    def __init__(self, auth_latency=0.15, metadata_latency=0.08, write_latency=0.1):
+        self.auth_latency = auth_latency
+        self.metadata_latency = metadata_latency
+        self.write_latency = write_latency
+        self.calls = Counter()
+        self.sheets = {}
+
+    def _hit(self, name, latency):
+        self.calls[name] += 1
+        if latency:
+            time.sleep(latency)
+
+    def authorize(self, credentials):
+        self._hit("authorize", self.auth_latency)
+        return FakeClient(self)
+
+
+class FakeClient:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def open_by_key(self, key):
+        self.backend._hit("open_by_key", self.backend.metadata_latency)
+        return FakeSpreadsheet(self.backend)
+
+
+class FakeSpreadsheet:
+    title = "Fake Ledger"
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def worksheet(self, title):
+        self.backend._hit("worksheet", self.backend.metadata_latency)
+        if title not in self.backend.sheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self.backend.sheets[title]
+
+    def worksheets(self):
+        self.backend._hit("worksheets", self.backend.metadata_latency)
+        return list(self.backend.sheets.values())
+
+    def add_worksheet(self, title, rows, cols):
+        self.backend._hit("add_worksheet", self.backend.write_latency)
+        worksheet = FakeWorksheet(self.backend, title)
+        self.backend.sheets[title] = worksheet
+        return worksheet
+
+
+class FakeWorksheet:
+    def __init__(self, backend, title, values=None):
+        self.backend = backend
+        self.title = title
+        self.values = values or []
+
+    def update(self, range_name, values):
+        self.backend._hit("update", self.backend.write_latency)
+        if range_name.startswith("A1"):
+            if self.values:
+                self.values[0] = list(values[0])
+            else:
+                self.values.append(list(values[0]))
+
+    def format(self, range_name, fmt):
+        self.backend._hit("format", self.backend.write_latency)
+
+    def append_row(self, values, value_input_option=None):
+        self.backend._hit("append_row", self.backend.write_latency)
+        self.values.append([str(v) for v in values])
+
+    def append_rows(self, values, value_input_option=None):
+        self.backend._hit("append_rows", self.backend.write_latency)
+        self.values.extend([str(v) for v in row] for row in values)
+
+    def get_all_values(self):
+        self.backend._hit("get_all_values", self.backend.metadata_latency)
+        return [list(row) for row in self.values]
+
+    def get_values(self, range_name=None):
+        self.backend._hit("get_values", self.backend.metadata_latency)
+        if not range_name:
+            return [list(row) for row in self.values]
+        start = int("".join(ch for ch in range_name.split(":")[0] if ch.isdigit()))
+        return [list(row) for row in self.values[start - 1 :]]
+
+    def col_values(self, col):
+        self.backend._hit("col_values", self.backend.metadata_latency)
+        return [row[col - 1] if len(row) >= col else "" for row in self.values]
+
+
+@contextmanager
+def patched_sheets(backend):
+    """Route SheetsService through ``backend`` instead of Google.
+
+    Appended rows go to a throwaway aggregate store, so a benchmark run
+    never touches the totals in ``data/aggregates.db``.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        store = AggregateStore(os.path.join(directory, "aggregates.db"))
+        with mock.patch(
+            "app.service.sheet.Credentials.from_service_account_file",
+            return_value=object(),
+        ), mock.patch(
+            "app.service.sheet.gspread.authorize", backend.authorize
+        ), mock.patch(
+            "app.service.sheet.aggregate_store", store
+        ):
+            yield backend
@@ -0,0 +1,87 @@
+"""Per-scan OCR latency, pytesseract subprocess per pass vs persistent workers.
+
+Runs the three OCR passes over synthetic receipts once through pytesseract,
+which starts a ``tesseract`` process and writes temporary image files for
+every pass, and once through the ``tesseract_engine`` pool of long-lived
+tesserocr instances fed from memory. The pytesseract column needs the
+``tesseract`` binary, both need ``eng`` and ``ind`` data.
+
+Run from the repository root::
+
+    python -m benchmarks.ocr_engine [scans]
+"""
+
+import logging
+import shutil
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytesseract
+from pytesseract import Output
+
+from app.service.ocr import OCRService
+from app.service.tesseract import LANG, tesseract_engine
+from benchmarks.receipt_crop import synthetic_photo
+
+
+def subprocess_image_to_data(image, psm):
+    # Jalur lama: satu proses tesseract dan file sementara per pass
+    return pytesseract.image_to_data(
+        image,
+        lang=LANG,
+        config=f"--oem 3 --psm {psm} -c preserve_interword_spaces=1",
+        output_type=Output.DICT,
+    )
+
+
+def _scan_ms(service, image_to_data, image_bytes):
+    start = time.perf_counter()
+    binary = service._preprocess(image_bytes)
+    for _, image, psm, inverted in service._passes(binary):
+        image_to_data(cv2.bitwise_not(image) if inverted else image, psm)
+    return (time.perf_counter() - start) * 1000
+
+
+def _run(image_to_data, service, corpus):
+    warmup = _scan_ms(service, image_to_data, corpus[0])
+    total = sum(_scan_ms(service, image_to_data, image_bytes) for image_bytes in corpus)
+    return warmup, total / len(corpus)
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rng = np.random.default_rng(5)
+    corpus = [
+        cv2.imencode(".jpg", synthetic_photo(rng, (960, 1280)))[1].tobytes()
+        for _ in range(count)
+    ]
+    service = OCRService()
+    print(f"{count} scans, 3 passes each")
+
+    per_scan = None
+    if shutil.which("tesseract") is None:
+        print("tesseract binary not installed, pytesseract path skipped")
+    else:
+        warmup, per_scan = _run(subprocess_image_to_data, service, corpus)
+        print(f"pytesseract  {per_scan:8.1f} ms/scan  (first {warmup:.1f} ms)")
+
+    start = time.perf_counter()
+    # Pass dijalankan berurutan, satu instance sudah cukup
+    tesseract_engine.workers = 1
+    tesseract_engine.start()
+    load_ms = (time.perf_counter() - start) * 1000
+    try:
+        p_warmup, p_per_scan = _run(tesseract_engine.image_to_data, service, corpus)
+    except RuntimeError as e:
+        print(f"tesserocr could not load {LANG} data: {e}")
+    else:
+        speedup = f", {per_scan / p_per_scan:.1f}x" if per_scan else ""
+        print(
+            f"tesserocr    {p_per_scan:8.1f} ms/scan  (first {p_warmup:.1f} ms, "
+            f"load {load_ms:.0f} ms once{speedup})"
+        )
+    finally:
+        tesseract_engine.stop()
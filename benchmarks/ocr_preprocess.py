@@ -0,0 +1,113 @@
+"""Latency and peak memory of OCR preprocessing, PIL chain vs in-place OpenCV.
+
+Each variant runs in a fresh process so the peak RSS growth of one does not
+hide the other; tracemalloc peaks cover numpy/OpenCV buffers only (PIL
+allocates outside the Python allocator).
+
+Run from the repository root::
+
+    python -m benchmarks.ocr_preprocess [photos]
+"""
+
+import io
+import logging
+import multiprocessing
+import resource
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image, ImageEnhance, ImageFilter
+
+from app.core.config import settings
+from app.service.ocr import OCRService
+from app.utils.receipt_image import prepare_receipt
+from benchmarks.receipt_crop import FRAMES, synthetic_photo
+
+
+def legacy_preprocess(image_bytes):
+    """The PIL based chain OCRService used before, including the crop."""
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    img_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+    gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+    gray = prepare_receipt(gray, settings.ocr_target_dpi)
+    blur = cv2.GaussianBlur(gray, (3, 3), 0)
+    thresh = cv2.adaptiveThreshold(
+        blur, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+    )
+    opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, np.ones((1, 1), np.uint8))
+    enhanced_image = ImageEnhance.Contrast(Image.fromarray(opening)).enhance(2.0)
+    enhanced_image = enhanced_image.filter(ImageFilter.SHARPEN)
+    inverted_image = Image.fromarray(cv2.bitwise_not(opening))
+    return enhanced_image, inverted_image
+
+
+def corpus(count):
+    rng = np.random.default_rng(11)
+    return [
+        cv2.imencode(".jpg", synthetic_photo(rng, FRAMES[i % len(FRAMES)]))[1].tobytes()
+        for i in range(count)
+    ]
+
+
+def _peak_rss_mb():
+    # VmHWM dimulai ulang saat exec; ru_maxrss mewarisi puncak proses induk
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(name, images, queue):
+    logging.disable(logging.INFO)
+    preprocess = legacy_preprocess if name == "legacy" else OCRService()._preprocess
+
+    rss_before = _peak_rss_mb()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for image_bytes in images:
+        preprocess(image_bytes)
+    elapsed = (time.perf_counter() - start) * 1000
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_growth = _peak_rss_mb() - rss_before
+    queue.put((elapsed / len(images), traced_peak / 1e6, rss_growth))
+
+
+def _same_output(images):
+    service = OCRService()
+    for image_bytes in images:
+        enhanced_image, _ = legacy_preprocess(image_bytes)
+        legacy = np.asarray(enhanced_image)
+        # Decode grayscale langsung bisa beda 1 level dari RGB -> gray
+        if np.mean(legacy != service._preprocess(image_bytes)) > 0.01:
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 9
+    context = multiprocessing.get_context("spawn")
+
+    # Foto dibuat di proses induk agar puncak RSS anak hanya dari preprocessing
+    images = corpus(count)
+    print(f"{count} photos, binary output matches: {_same_output(images[:3])}")
+    for name in ("legacy", "in-place"):
+        queue = context.Queue()
+        process = context.Process(target=_measure, args=(name, images, queue))
+        process.start()
+        per_image, traced_mb, rss_mb = queue.get()
+        process.join()
+        print(
+            f"{name:9} {per_image:7.1f} ms/image  "
+            f"tracemalloc peak {traced_mb:6.1f} MB  peak RSS +{rss_mb:6.1f} MB"
+        )
@@ -0,0 +1,122 @@
+"""Pixels and OCR time per scan, full frame vs receipt crop.
+
+Builds synthetic photos of a receipt lying skewed on a textured table at
+common phone/Telegram resolutions. Tesseract timings are only reported
+when the ``tesseract`` binary is installed.
+
+Run from the repository root::
+
+    python -m benchmarks.receipt_crop [photos]
+"""
+
+import logging
+import shutil
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytesseract
+
+from app.core.config import settings
+from app.utils.receipt_image import find_receipt, prepare_receipt
+
+FRAMES = [(960, 1280), (1280, 1706), (3000, 4000)]
+ITEMS = ["NASI GORENG", "ES TEH MANIS", "AYAM BAKAR", "KERUPUK", "AIR MINERAL"]
+
+
+def synthetic_receipt(rng):
+    lines = ["TOKO MAKMUR JAYA", "JL. MERDEKA NO. 10", "31/08/2025 14:05", ""]
+    total = 0
+    for _ in range(int(rng.integers(4, 11))):
+        price = int(rng.integers(5, 80)) * 1000
+        total += price
+        lines.append(f"{str(rng.choice(ITEMS)):<16}{price:>10,}".replace(",", "."))
+    lines += ["", f"{'TOTAL':<16}{total:>10,}".replace(",", "."), "TERIMA KASIH"]
+
+    paper = np.full((120 + 45 * len(lines), 640), 245, np.uint8)
+    for i, line in enumerate(lines):
+        cv2.putText(
+            paper, line, (30, 70 + 45 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 20, 2
+        )
+    return paper
+
+
+def synthetic_photo(rng, frame):
+    width, height = frame
+    table = rng.integers(40, 110, (height, width), dtype=np.uint8)
+    table = cv2.GaussianBlur(table, (9, 9), 0)
+
+    paper = synthetic_receipt(rng)
+    scale = rng.uniform(0.45, 0.65) * height / paper.shape[0]
+    paper = cv2.resize(paper, None, fx=scale, fy=scale)
+    ph, pw = paper.shape
+
+    cx, cy = width / 2, height / 2
+    jitter = 0.04 * width
+    corners = np.array(
+        [
+            [cx - pw / 2, cy - ph / 2],
+            [cx + pw / 2, cy - ph / 2],
+            [cx + pw / 2, cy + ph / 2],
+            [cx - pw / 2, cy + ph / 2],
+        ]
+    ) + rng.uniform(-jitter, jitter, (4, 2))
+    source = np.array([[0, 0], [pw, 0], [pw, ph], [0, ph]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(source, corners.astype(np.float32))
+    mask = cv2.warpPerspective(np.full_like(paper, 255), matrix, (width, height))
+    warped = cv2.warpPerspective(paper, matrix, (width, height))
+    return np.where(mask > 0, warped, table)
+
+
+def legacy_frame(gray):
+    """The pre-crop behaviour: whole frame, 2x LANCZOS below 1000px."""
+    height, width = gray.shape
+    if width < 1000 or height < 1000:
+        return cv2.resize(gray, None, fx=2, fy=2, interpolation=cv2.INTER_LANCZOS4)
+    return gray
+
+
+def _ocr_ms(gray):
+    start = time.perf_counter()
+    pytesseract.image_to_string(gray, lang="eng", config="--oem 3 --psm 6")
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    has_tesseract = shutil.which("tesseract") is not None
+    rng = np.random.default_rng(3)
+
+    legacy_pixels = cropped_pixels = detected = 0
+    crop_ms = legacy_ocr_ms = cropped_ocr_ms = 0.0
+    for i in range(count):
+        photo = synthetic_photo(rng, FRAMES[i % len(FRAMES)])
+        legacy = legacy_frame(photo)
+
+        start = time.perf_counter()
+        cropped = prepare_receipt(photo, settings.ocr_target_dpi)
+        crop_ms += (time.perf_counter() - start) * 1000
+        detected += find_receipt(photo) is not None
+
+        legacy_pixels += legacy.size
+        cropped_pixels += cropped.size
+        if has_tesseract:
+            legacy_ocr_ms += _ocr_ms(legacy)
+            cropped_ocr_ms += _ocr_ms(cropped)
+
+    print(f"{count} photos, receipt detected in {detected}")
+    print(f"full frame  {legacy_pixels / count / 1e6:6.2f} MP/scan")
+    print(
+        f"cropped     {cropped_pixels / count / 1e6:6.2f} MP/scan  "
+        f"({legacy_pixels / cropped_pixels:.1f}x fewer, crop {crop_ms / count:.1f} ms/scan)"
+    )
+    if has_tesseract:
+        print(f"ocr full    {legacy_ocr_ms / count:8.1f} ms/scan")
+        print(
+            f"ocr crop    {cropped_ocr_ms / count:8.1f} ms/scan  "
+            f"({legacy_ocr_ms / cropped_ocr_ms:.1f}x)"
+        )
+    else:
+        print("tesseract not installed, OCR timings skipped")
@@ -0,0 +1,94 @@
+"""Receipt text parsing, regex per field vs single-pass line classifier.
+
+Run from the repository root::
+
+    python -m benchmarks.receipt_parsing [receipts]
+"""
+
+import logging
+import random
+import sys
+import time
+
+from app.utils.receipt_parser import ReceiptParser, scan_receipt
+from benchmarks.legacy_receipt_parser import LegacyReceiptParser
+
+STORES = ["TOKO MAKMUR JAYA", "INDOMARET CABANG 12", "RESTO SEDERHANA", "KOPI KENANGAN"]
+ITEMS = ["NASI GORENG", "ES TEH MANIS", "AYAM BAKAR", "KERUPUK", "AIR MINERAL", "ROTI"]
+COMPARED_FIELDS = ["tanggal", "nama", "kategori", "jumlah", "tax", "discount"]
+
+
+def _rp(amount):
+    return f"{amount:,}".replace(",", ".")
+
+
+def synthetic_texts(count, seed=5):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        lines = [rng.choice(STORES), f"JL. MERDEKA NO. {rng.randrange(1, 200)}"]
+        if rng.random() < 0.5:
+            lines.append(
+                f"{rng.randrange(1, 29):02d}/{rng.randrange(1, 13):02d}/2025 14:05"
+            )
+        else:
+            lines.append(f"Tanggal {rng.randrange(1, 29)} Agustus 2025")
+        subtotal = 0
+        for _ in range(rng.randrange(3, 25)):
+            price = rng.randrange(1, 100) * 1000
+            quantity = rng.randrange(1, 4)
+            subtotal += price * quantity
+            suffix = f" x {quantity}" if quantity > 1 else ""
+            lines.append(f"{rng.choice(ITEMS)} {_rp(price)}{suffix}")
+        lines.append(f"SUBTOTAL {_rp(subtotal)}")
+        total = subtotal
+        if rng.random() < 0.5:
+            tax = subtotal // 10
+            total += tax
+            lines.append(f"PPN {_rp(tax)}")
+        if rng.random() < 0.3:
+            lines.append("Diskon 10%")
+        lines.append(f"TOTAL {_rp(total)}")
+        lines += [f"TUNAI {_rp(total + 5000)}", "KEMBALI 5.000", "TERIMA KASIH"]
+        texts.append("\n".join(lines))
+    return texts
+
+
+def _comparable(result, field):
+    # Jam pada tanggal diisi datetime.now(), bisa berganti menit antar run
+    return result[field].rsplit(" ", 1)[0] if field == "tanggal" else result[field]
+
+
+def _time(parser, texts, repeat=3):
+    """Results and best-of-``repeat`` wall time in ms."""
+    best = None
+    for _ in range(repeat):
+        scan_receipt.cache_clear()
+        start = time.perf_counter()
+        results = [parser.parse_receipt_text(text) for text in texts]
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return results, best
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    texts = synthetic_texts(count)
+
+    legacy_results, legacy_ms = _time(LegacyReceiptParser(), texts)
+    results, single_ms = _time(ReceiptParser(), texts)
+
+    mismatches = {
+        field: sum(
+            _comparable(old, field) != _comparable(new, field)
+            for old, new in zip(legacy_results, results)
+        )
+        for field in COMPARED_FIELDS
+    }
+    print(f"{count} receipts, field mismatches vs legacy: {mismatches}")
+    print(f"legacy       {legacy_ms / count * 1000:8.1f} us/receipt")
+    print(
+        f"single pass  {single_ms / count * 1000:8.1f} us/receipt  "
+        f"({legacy_ms / single_ms:.1f}x)"
+    )
@@ -0,0 +1,49 @@
+"""Save latency of one confirmed transaction, per-save client vs pooled client.
+
+Run from the repository root::
+
+    python -m benchmarks.sheets_save
+"""
+
+import statistics
+import time
+
+from app.service import sheet
+from benchmarks.fake_sheets import FakeBackend, patched_sheets
+
+SAVES = 20
+
+
+def _transaction(i):
+    return {
+        "tanggal": "2025-08-31",
+        "nama": f"Transaksi {i}",
+        "jenis": "Pengeluaran",
+        "sumber": "Cash",
+        "kategori": "Makanan",
+        "jumlah": 25000,
+        "deskripsi": "",
+    }
+
+
+def _run(label, get_service):
+    backend = FakeBackend()
+    timings = []
+    with patched_sheets(backend):
+        sheet._sheets_service = None
+        for i in range(SAVES):
+            start = time.perf_counter()
+            get_service().add_transaction(_transaction(i))
+            timings.append((time.perf_counter() - start) * 1000)
+        sheet._sheets_service = None
+
+    print(
+        f"{label:<22} median {statistics.median(timings):7.1f} ms  "
+        f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:7.1f} ms  "
+        f"calls {dict(backend.calls)}"
+    )
+
+
+if __name__ == "__main__":
+    _run("new SheetsService()", sheet.SheetsService)
+    _run("get_sheets_service()", sheet.get_sheets_service)
@@ -0,0 +1,133 @@
+"""Monthly aggregation over a synthetic ledger, row loop vs numpy columns.
+
+Run from the repository root::
+
+    python -m benchmarks.summary_aggregation [rows]
+"""
+
+import logging
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from app.utils.ledger import LedgerArrays
+
+CATEGORIES = ["Makanan", "Transportasi", "Invest", "Tagihan", "Belanja", "Lainnya"]
+MONTHS_ID = [
+    "Januari",
+    "Februari",
+    "Maret",
+    "April",
+    "Mei",
+    "Juni",
+    "Juli",
+    "Agustus",
+    "September",
+    "Oktober",
+    "November",
+    "Desember",
+]
+
+
+def synthetic_rows(count, seed=7):
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+    rows = []
+    for i in range(count):
+        day = start + timedelta(days=rng.randrange(365))
+        shape = rng.random()
+        if shape < 0.6:
+            date_str = day.strftime("%d/%m/%Y")
+        elif shape < 0.8:
+            date_str = day.isoformat()
+        else:
+            date_str = f"{MONTHS_ID[day.month - 1]} {day.day}, {day.year}"
+        income = rng.random() < 0.1
+        rows.append(
+            [
+                date_str,
+                f"Transaksi {i}",
+                "Pemasukan" if income else "Pengeluaran",
+                "Cash",
+                "Gaji" if income else rng.choice(CATEGORIES),
+                f"{rng.randrange(1, 500) * 1000:,}".replace(",", "."),
+                "",
+            ]
+        )
+    return rows
+
+
+def parse_indonesian_date(date_str):
+    parts = date_str.replace(",", "").split()
+    if len(parts) != 3:
+        return None
+    month_name, day, year = parts
+    month_number = {name.lower(): i for i, name in enumerate(MONTHS_ID, 1)}.get(
+        month_name.lower()
+    )
+    if not month_number:
+        return None
+    try:
+        return datetime(int(year), month_number, int(day))
+    except ValueError:
+        return None
+
+
+def row_loop(rows, year, month):
+    """The per-row aggregation SummaryGenerator used before, minus logging."""
+    month_data = []
+    for row in rows:
+        date_obj = parse_indonesian_date(row[0].strip())
+        if not date_obj:
+            for fmt in [
+                "%d/%m/%Y",
+                "%Y-%m-%d",
+                "%d-%m-%Y",
+                "%d %B %Y",
+                "%d %b %Y",
+                "%Y/%m/%d",
+            ]:
+                try:
+                    date_obj = datetime.strptime(row[0].strip(), fmt)
+                    break
+                except ValueError:
+                    continue
+        if date_obj and date_obj.month == month and date_obj.year == year:
+            month_data.append(row)
+
+    total_income = total_expense = 0
+    category_totals = {}
+    for row in month_data:
+        amount_str = row[5].replace(".", "").replace(",", "").strip()
+        amount = int(amount_str) if amount_str.isdigit() else 0
+        if row[2].lower() == "pemasukan":
+            total_income += amount
+        else:
+            total_expense += amount
+            category_totals[row[4]] = category_totals.get(row[4], 0) + amount
+    return len(month_data), total_income, total_expense, category_totals
+
+
+def vectorized(rows, year, month):
+    ledger = LedgerArrays(rows, 0, 5, 2, 4)
+    return ledger.month_totals(year, month)
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = synthetic_rows(count)
+    loop_result, loop_ms = _time(row_loop, rows, 2025, 8)
+    vec_result, vec_ms = _time(vectorized, rows, 2025, 8)
+    assert loop_result == vec_result, (loop_result, vec_result)
+
+    print(f"{count} rows, {loop_result[0]} in August 2025")
+    print(f"row loop    {loop_ms:8.1f} ms")
+    print(f"vectorized  {vec_ms:8.1f} ms  ({loop_ms / vec_ms:.1f}x)")
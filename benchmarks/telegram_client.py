@@ -0,0 +1,138 @@
+"""Telegram call latency, a new client per call vs the shared pooled client.
+
+Starts a local stand-in for api.telegram.org that answers Bot API calls and
+file downloads over HTTP/1.1 keep-alive. Every new connection waits
+``handshake_ms`` before it is served, standing in for the TCP and TLS
+handshake to the real server. Each simulated photo message does what
+``TelegramService`` does: getFile, download the photo, sendMessage.
+
+Run from the repository root::
+
+    python -m benchmarks.telegram_client [messages] [handshake_ms]
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import time
+
+import httpx
+
+from app.utils import api
+
+PHOTO = bytes(range(256)) * 800  # ~200 KB, kira-kira foto nota dari Telegram
+
+
+class StandInTelegram:
+    def __init__(self, handshake_ms: float):
+        self.handshake = handshake_ms / 1000
+        self.connections = 0
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(self.handshake)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+
+                path = request_line.split()[1].decode()
+                if path.startswith("/file/"):
+                    body, content_type = PHOTO, "application/octet-stream"
+                else:
+                    result = {"file_path": "photos/1.jpg"} if "getFile" in path else {}
+                    body = json.dumps({"ok": True, "result": result}).encode()
+                    content_type = "application/json"
+                header = (
+                    f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n"
+                )
+                writer.write(header.encode() + body)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+# Perilaku lama: client baru untuk setiap panggilan
+async def legacy_post(url, data):
+    async with httpx.AsyncClient() as client:
+        return (await client.post(url, json=data)).json()
+
+
+async def legacy_download(url):
+    async with httpx.AsyncClient() as client:
+        return (await client.get(url)).content
+
+
+async def photo_message(base, post, download):
+    info = await post(f"{base}/bot/getFile", {"file_id": "x"})
+    photo = await download(f"{base}/file/bot/{info['result']['file_path']}")
+    assert len(photo) == len(PHOTO)
+    await post(f"{base}/bot/sendMessage", {"chat_id": 1, "text": "ok"})
+
+
+async def run(label, server, base, post, download, messages):
+    server.connections = 0
+    start = time.perf_counter()
+    for _ in range(messages):
+        await photo_message(base, post, download)
+    sequential = (time.perf_counter() - start) * 1000 / messages
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(photo_message(base, post, download) for _ in range(messages))
+    )
+    burst = (time.perf_counter() - start) * 1000
+    print(
+        f"{label:<16} {sequential:7.1f} ms/message  "
+        f"burst of {messages} {burst:7.1f} ms  connections {server.connections}"
+    )
+
+
+async def main(messages: int, handshake_ms: float):
+    server = StandInTelegram(handshake_ms)
+    base = await server.start()
+    print(
+        f"{messages} photo messages (getFile + download + sendMessage), "
+        f"{handshake_ms:g} ms per new connection"
+    )
+    await run("client per call", server, base, legacy_post, legacy_download, messages)
+    api.telegram_http.start()
+    await run(
+        "shared client",
+        server,
+        base,
+        api.telegram_post,
+        api.telegram_download,
+        messages,
+    )
+    await api.telegram_http.close()
+    await server.stop()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    handshake_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(messages, handshake_ms))
@@ -0,0 +1,139 @@
+"""Per-update cost of payload logging in webhook handling.
+
+Compares the old INFO-level ``json.dumps(update.dict())`` and
+``json.dumps(message.dict())`` lines with ``log_payload``: off (the
+default), sampled at 1%, and fully rendered at DEBUG. The last line runs
+``TelegramService.process_update`` end to end with ``handle_command`` and
+the outbound dispatcher stubbed out. Log records go to an in-memory
+stream, so only formatting and encoding are measured.
+
+Run from the repository root::
+
+    python -m benchmarks.webhook_logging [updates]
+"""
+
+import asyncio
+import io
+import json
+import logging
+import sys
+import time
+import warnings
+
+from app.schema.webhook import Update
+from app.service import webhook
+from app.utils import logger as log_utils
+
+PHOTO_UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 42,
+        "from": {"id": 7, "is_bot": False, "first_name": "Budi", "language_code": "id"},
+        "chat": {"id": 7, "first_name": "Budi", "type": "private"},
+        "date": 1760000000,
+        "photo": [
+            {
+                "file_id": f"AgACAgUAAxkBAAI{size}",
+                "file_unique_id": f"AQAD{size}",
+                "width": size,
+                "height": size * 4 // 3,
+                "file_size": size * 90,
+            }
+            for size in (90, 320, 800, 1280)
+        ],
+    },
+}
+CALLBACK_UPDATE = {
+    "update_id": 2,
+    "callback_query": {
+        "id": "4382bfdwdsb323b2d9",
+        "from": {"id": 7, "is_bot": False, "first_name": "Budi"},
+        "message": {
+            "message_id": 43,
+            "chat": {"id": 7, "type": "private"},
+            "date": 1760000001,
+            "text": "Pilih jenis transaksi:",
+        },
+        "chat_instance": "-2971418931848",
+        "data": "Pengeluaran",
+    },
+}
+
+
+def legacy_logging(logger, update):
+    # Baris log lama di process_update, _handle_message dan callback query
+    logger.info(f"Update structure: {json.dumps(update.dict())}")
+    if update.message:
+        logger.info(f"Message structure: {json.dumps(update.message.dict())}")
+    if update.callback_query:
+        logger.info(f"Callback query: {update.callback_query}")
+
+
+def current_logging(logger, update):
+    log_utils.log_payload(logger, "Update structure", update)
+    if update.callback_query:
+        log_utils.log_payload(logger, "Callback query", update.callback_query)
+
+
+def per_update_us(fn, updates, logger):
+    start = time.perf_counter()
+    for update in updates:
+        fn(logger, update)
+    return (time.perf_counter() - start) * 1e6 / len(updates)
+
+
+async def _handle_command(*args):
+    return "Pilih kategori:", None
+
+
+async def _dispatch(method, data, chat_id=None):
+    return {"ok": True, "result": {}}
+
+
+def process_update_us(updates):
+    webhook.handle_command = _handle_command
+    webhook.telegram_dispatcher.call = _dispatch
+    webhook.receipt_cache.has_file = lambda file_unique_id: True
+    service = webhook.TelegramService()
+
+    async def run():
+        start = time.perf_counter()
+        for update in updates:
+            await service.process_update(update)
+        return (time.perf_counter() - start) * 1e6 / len(updates)
+
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    updates = [
+        Update.model_validate(PHOTO_UPDATE if i % 2 else CALLBACK_UPDATE)
+        for i in range(count)
+    ]
+
+    # Semua logger menulis ke memori agar yang terukur hanya format dan encode
+    logging.basicConfig(stream=io.StringIO(), level=logging.INFO, force=True)
+    # update.dict() pada baris lama sudah deprecated di pydantic 2
+    warnings.simplefilter("ignore", DeprecationWarning)
+    bench_logger = logging.getLogger("benchmarks.webhook_logging")
+
+    def at_level(level):
+        bench_logger.setLevel(level)
+        webhook.logger.setLevel(level)
+
+    print(f"{count} updates (photo messages and callback queries)")
+    at_level(logging.INFO)
+    legacy = per_update_us(legacy_logging, updates, bench_logger)
+    print(f"legacy INFO dumps     {legacy:7.1f} us/update")
+    off = per_update_us(current_logging, updates, bench_logger)
+    print(f"log_payload off       {off:7.1f} us/update")
+    log_utils.settings.log_payload_sample_rate = 0.01
+    sampled = per_update_us(current_logging, updates, bench_logger)
+    print(f"log_payload 1% sample {sampled:7.1f} us/update")
+    log_utils.settings.log_payload_sample_rate = 0.0
+    at_level(logging.DEBUG)
+    debug = per_update_us(current_logging, updates, bench_logger)
+    print(f"log_payload DEBUG     {debug:7.1f} us/update")
+    at_level(logging.INFO)
+    print(f"process_update total  {process_update_us(updates):7.1f} us/update")
@@ -1,21 +1,49 @@
 import uvicorn
 import logging
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.router.webhook import router as webhook
 from app.router.sheets import router as sheets
 from app.router.ocr import router as ocr
 from app.router.gemini import router as scan
+from app.service.transaction_queue import transaction_queue
+from app.service.update_dedup import update_dedup
+from app.service.receipt_batch import receipt_batch_queue
+from app.service.telegram_dispatcher import telegram_dispatcher
+from app.service.tesseract import tesseract_engine
+from app.service.webhook import update_lanes
+from app.utils.api import telegram_http
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    telegram_http.start()
+    transaction_queue.start()
+    update_dedup.start()
+    tesseract_engine.start()
+    await receipt_batch_queue.start()
+    await telegram_dispatcher.start()
+    yield
+    await update_lanes.stop()
+    update_dedup.stop()
+    await telegram_dispatcher.stop()
+    await receipt_batch_queue.stop()
+    tesseract_engine.stop()
+    transaction_queue.stop()
+    await telegram_http.close()
+
+
 app = FastAPI(
     title="Bot Telegram",
     description="Bot Telegram Financial Management Api",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(